@@ -0,0 +1 @@
+../task08/analysis.py
\ No newline at end of file
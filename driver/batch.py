@@ -0,0 +1,312 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor
+from glob import glob
+from time import perf_counter
+from typing import Any, Iterator, NamedTuple, Optional
+
+from briltxt import load_program
+from driver import optimize_prog
+from ircache import IRCache
+from memo import DEFAULT_LIMIT, ResultCache
+from passes import pass_list
+from stats import disable, enable, merge, Report, timed
+from syntax import Program
+
+class Result(NamedTuple):
+    file: str
+    text: str
+    before: int
+    after: int
+    elapsed: float
+    hits: int = 0
+    misses: int = 0
+    stats: Optional[Report] = None
+
+def count_instrs(prog: Program) -> int:
+    return sum(
+        'op' in item for func in prog['functions'] for item in func['instrs']
+    )
+
+def find_inputs(patterns: list[str]) -> list[str]:
+    files: list[str] = []
+
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.extend(sorted(
+                glob(os.path.join(pattern, '*.json')) +
+                glob(os.path.join(pattern, '*.bril'))
+            ))
+        else:
+            files.extend(sorted(glob(pattern)))
+
+    return list(dict.fromkeys(os.path.normpath(file) for file in files))
+
+def output_names(files: list[str], out: str) -> dict[str, str]:
+    if not files:
+        return {}
+
+    root = os.path.commonpath(
+        [os.path.dirname(os.path.abspath(file)) for file in files]
+    )
+    names: dict[str, str] = {}
+    owners: dict[str, str] = {}
+
+    for file in files:
+        relative = os.path.relpath(os.path.abspath(file), root)
+        name = os.path.join(out, os.path.splitext(relative)[0] + '.json')
+
+        if name in owners:
+            raise ValueError(
+                f'{owners[name]} and {file} would both be written to {name}'
+            )
+
+        owners[name] = file
+        names[file] = name
+
+    return names
+
+def optimize_file(
+    file: str,
+    names: list[str],
+    target: Optional[str],
+    trace: Any,
+    cache: Optional[str] = None,
+    memo: Optional[str] = None,
+    stats: bool = False,
+    memory: bool = False
+) -> Result:
+    with open(file) as f:
+        text = f.read()
+
+    if stats:
+        enable(memory)
+
+    try:
+        with timed('io.parse'):
+            if cache is not None:
+                prog = IRCache(cache).program(text)
+            else:
+                prog = load_program(text)
+
+        before = count_instrs(prog)
+        results = ResultCache(memo) if memo is not None else None
+
+        start = perf_counter()
+        optimize_prog(prog, names, target, trace, memo=results)
+        elapsed = perf_counter() - start
+    finally:
+        collected = disable() if stats else None
+
+    return Result(
+        file,
+        json.dumps(prog),
+        before,
+        count_instrs(prog),
+        elapsed,
+        results.hits if results is not None else 0,
+        results.misses if results is not None else 0,
+        collected.report() if collected is not None else None
+    )
+
+def optimize_files(
+    files: list[str],
+    names: list[str],
+    target: Optional[str],
+    trace: Any,
+    pool: Optional[Executor] = None,
+    cache: Optional[str] = None,
+    memo: Optional[str] = None,
+    stats: bool = False,
+    memory: bool = False
+) -> Iterator[Result]:
+    if pool is None:
+        for file in files:
+            yield optimize_file(
+                file, names, target, trace, cache, memo, stats, memory
+            )
+
+        return
+
+    order = sorted(files, key=os.path.getsize, reverse=True)
+    futures = {
+        file: pool.submit(
+            optimize_file,
+            file,
+            names,
+            target,
+            trace,
+            cache,
+            memo,
+            stats,
+            memory
+        ) for file in order
+    }
+
+    for file in files:
+        yield futures[file].result()
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Runs a pipeline of passes over many programs.'
+    )
+
+    parser.add_argument(
+        'inputs',
+        nargs='+',
+        help='directories of .json or .bril files, or glob patterns'
+    )
+    parser.add_argument(
+        '--passes',
+        type=pass_list,
+        action='extend',
+        required=True,
+        help='comma-separated passes to run in order, may be repeated'
+    )
+
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument(
+        '--out',
+        help='directory to write optimized programs to'
+    )
+    output.add_argument(
+        '--ndjson',
+        type=argparse.FileType('w'),
+        help='file to stream optimized programs to, one per line'
+    )
+
+    parser.add_argument(
+        '--summary',
+        type=argparse.FileType('w'),
+        default=sys.stderr
+    )
+    parser.add_argument(
+        '--trace',
+        type=argparse.FileType('r')
+    )
+    parser.add_argument(
+        '--func'
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=1
+    )
+    parser.add_argument(
+        '--cache',
+        help='directory of binary IR for .bril text inputs, keyed by '
+             'content hash'
+    )
+    parser.add_argument(
+        '--memo',
+        help='directory of optimized functions keyed by content hash'
+    )
+    parser.add_argument(
+        '--memo-limit',
+        type=int,
+        default=DEFAULT_LIMIT,
+        help='bytes to keep in the --memo directory'
+    )
+    parser.add_argument(
+        '--stats',
+        type=argparse.FileType('w'),
+        help='file to write per-file and total statistics to as JSON'
+    )
+    parser.add_argument(
+        '--memory',
+        action='store_true',
+        help='also record peak allocations in --stats (slow)'
+    )
+
+    args = parser.parse_args()
+
+    if 'stitch' in args.passes and (args.trace is None or args.func is None):
+        parser.error('stitch requires --trace and --func')
+
+    for pattern in args.inputs:
+        if not os.path.isdir(pattern) and not glob(pattern):
+            parser.error(f'no inputs match {pattern}')
+
+    files = find_inputs(args.inputs)
+    trace = json.load(args.trace) if args.trace is not None else None
+
+    outputs: dict[str, str] = {}
+
+    if args.out is not None:
+        try:
+            outputs = output_names(files, args.out)
+        except ValueError as e:
+            parser.error(str(e))
+
+        for name in outputs.values():
+            os.makedirs(os.path.dirname(name), exist_ok=True)
+
+    writer = csv.writer(args.summary)
+    writer.writerow(['file', 'before', 'after', 'delta', 'ms'])
+
+    pool = ProcessPoolExecutor(args.jobs) if args.jobs > 1 else None
+    before = after = hits = misses = 0
+    elapsed = 0.0
+    reports: dict[str, Report] = {}
+    total: Report = {'timers': {}, 'counters': {}}
+
+    try:
+        for result in optimize_files(
+            files,
+            args.passes,
+            args.func,
+            trace,
+            pool,
+            args.cache,
+            args.memo,
+            args.stats is not None,
+            args.memory
+        ):
+            if args.out is not None:
+                with open(outputs[result.file], 'w') as f:
+                    f.write(result.text)
+            else:
+                args.ndjson.write(result.text + '\n')
+
+            writer.writerow([
+                result.file,
+                result.before,
+                result.after,
+                result.after - result.before,
+                f'{result.elapsed * 1000:.3f}'
+            ])
+
+            before += result.before
+            after += result.after
+            elapsed += result.elapsed
+            hits += result.hits
+            misses += result.misses
+
+            if result.stats is not None:
+                reports[result.file] = result.stats
+                merge(total, result.stats)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    writer.writerow([
+        'total',
+        before,
+        after,
+        after - before,
+        f'{elapsed * 1000:.3f}'
+    ])
+
+    if args.memo is not None:
+        ResultCache(args.memo, args.memo_limit).prune()
+        print(f'memo: {hits} hits, {misses} misses', file=sys.stderr)
+
+    if args.stats is not None:
+        json.dump({'files': reports, 'total': total}, args.stats)
+        args.stats.write('\n')
+
+if __name__ == '__main__':
+    main()
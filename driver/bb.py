@@ -0,0 +1 @@
+../task03/bb.py
\ No newline at end of file
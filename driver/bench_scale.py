@@ -0,0 +1,398 @@
+import argparse
+import gc
+import json
+import math
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from time import perf_counter
+from typing import Any, Callable
+
+from bb import func_blocks
+from cfg import CFG
+from dom import dom_frontier, dominators
+from labels import insert_labels, LabelGenerator
+from licm import licm_func
+from lva import lva
+from lvn import lvn
+from rda import rda
+from ssa import from_ssa, insert_explicit_return, to_ssa
+from symbols import symbols
+from synth import SHAPES, synthesize
+from syntax import Function
+from tdce import tdce
+
+Stage = Callable[[Function], Callable[[], object]]
+
+MIN_REPEAT = 3
+MIN_POINTS = 3
+
+def graph_of(func: Function) -> CFG:
+    return CFG.from_blocks(func_blocks(func))
+
+def ssa_graph(func: Function) -> tuple[CFG, LabelGenerator]:
+    blocks = func_blocks(func)
+    blocks.insert(0, [{'label': '__entry'}])
+
+    graph = CFG.from_blocks(blocks)
+    gen = LabelGenerator(blocks)
+
+    insert_labels(blocks, gen)
+    insert_explicit_return(graph)
+
+    return graph, gen
+
+def params(func: Function) -> list[str]:
+    return [arg['name'] for arg in func.get('args', [])]
+
+def stage_dominators(func: Function) -> Callable[[], object]:
+    graph = graph_of(func)
+
+    return lambda: dominators(graph)
+
+def stage_frontier(func: Function) -> Callable[[], object]:
+    graph = graph_of(func)
+    dom = dominators(graph)
+
+    return lambda: dom_frontier(graph, dom)
+
+def stage_lva(func: Function) -> Callable[[], object]:
+    blocks = func_blocks(func)
+    graph = CFG.from_blocks(blocks)
+    table = symbols(blocks, params(func))
+
+    return lambda: lva(graph, table)
+
+def stage_rda(func: Function) -> Callable[[], object]:
+    blocks = func_blocks(func)
+    graph = CFG.from_blocks(blocks)
+    table = symbols(blocks, params(func))
+
+    return lambda: rda(graph, table)
+
+def stage_to_ssa(func: Function) -> Callable[[], object]:
+    graph, _ = ssa_graph(func)
+
+    return lambda: to_ssa(graph, params(func))
+
+def stage_from_ssa(func: Function) -> Callable[[], object]:
+    graph, gen = ssa_graph(func)
+    to_ssa(graph, params(func))
+
+    return lambda: from_ssa(graph, gen)
+
+def stage_lvn(func: Function) -> Callable[[], object]:
+    blocks = func_blocks(func)
+
+    return lambda: [lvn(block) for block in blocks]
+
+def stage_tdce(func: Function) -> Callable[[], object]:
+    blocks = func_blocks(func)
+
+    return lambda: tdce(blocks)
+
+def stage_licm(func: Function) -> Callable[[], object]:
+    return lambda: licm_func(func)
+
+STAGES: dict[str, Stage] = {
+    'dominators': stage_dominators,
+    'frontier': stage_frontier,
+    'lva': stage_lva,
+    'rda': stage_rda,
+    'to_ssa': stage_to_ssa,
+    'from_ssa': stage_from_ssa,
+    'lvn': stage_lvn,
+    'tdce': stage_tdce,
+    'licm': stage_licm
+}
+
+def measure(stage: Stage, func: Function) -> float:
+    run = stage(deepcopy(func))
+    gc.collect()
+    gc.disable()
+
+    try:
+        start = perf_counter()
+        run()
+
+        return perf_counter() - start
+    finally:
+        gc.enable()
+
+def measure_all(
+    stage: Stage,
+    funcs: list[Function],
+    repeat: int
+) -> list[float]:
+    for func in funcs:
+        measure(stage, func)
+
+    seconds = [math.inf] * len(funcs)
+
+    for _ in range(repeat):
+        for i, func in enumerate(funcs):
+            seconds[i] = min(seconds[i], measure(stage, func))
+
+    return seconds
+
+def slope(sizes: list[int], seconds: list[float]) -> float:
+    points = [
+        (math.log(size), math.log(elapsed))
+            for size, elapsed in zip(sizes, seconds) if elapsed > 0
+    ]
+
+    if len(points) < 2:
+        return 0.0
+
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    var = sum((x - mean_x) ** 2 for x, _ in points)
+
+    if var == 0:
+        return 0.0
+
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var
+
+def run_suite(
+    shapes: list[str],
+    sizes: list[int],
+    stages: list[str],
+    repeat: int,
+    seed: int
+) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+
+    for shape in shapes:
+        funcs = [synthesize(shape, size, seed=seed) for size in sizes]
+        instrs = [len(func['instrs']) for func in funcs]
+        timings: dict[str, Any] = {}
+
+        for name in stages:
+            seconds = measure_all(STAGES[name], funcs, repeat)
+            timings[name] = {
+                'seconds': seconds,
+                'slope': slope(instrs, seconds)
+            }
+
+        results[shape] = {
+            'sizes': sizes,
+            'instrs': instrs,
+            'stages': timings
+        }
+
+    return results
+
+def fastest(runs: list[dict[str, Any]]) -> dict[str, Any]:
+    results = runs[0]
+
+    for run in runs[1:]:
+        for shape, result in run.items():
+            for name, timing in result['stages'].items():
+                best = results[shape]['stages'][name]
+                best['seconds'] = [
+                    min(old, new)
+                        for old, new in zip(best['seconds'], timing['seconds'])
+                ]
+
+    for result in results.values():
+        for timing in result['stages'].values():
+            timing['slope'] = slope(result['instrs'], timing['seconds'])
+
+    return results
+
+def run_processes(
+    processes: int,
+    shapes: list[str],
+    sizes: list[int],
+    stages: list[str],
+    repeat: int,
+    seed: int
+) -> dict[str, Any]:
+    with ProcessPoolExecutor(1, max_tasks_per_child=1) as pool:
+        futures = [
+            pool.submit(run_suite, shapes, sizes, stages, repeat, seed)
+                for _ in range(processes)
+        ]
+
+        return fastest([future.result() for future in futures])
+
+def print_table(results: dict[str, Any]):
+    for shape, result in results.items():
+        header = ''.join(f'{n:>10}' for n in result['instrs'])
+        print(f'{shape:<12}{"instrs":>10}{header}{"slope":>8}')
+
+        for name, timing in result['stages'].items():
+            cells = ''.join(
+                f'{elapsed * 1000:10.3f}' for elapsed in timing['seconds']
+            )
+            print(f'{"":<12}{name:>10}{cells}{timing["slope"]:8.2f}')
+
+        print()
+
+def regressions(
+    results: dict[str, Any],
+    baseline: dict[str, Any],
+    threshold: float,
+    margin: float,
+    floor: float
+) -> list[str]:
+    found: list[str] = []
+
+    for shape, result in results.items():
+        if shape not in baseline:
+            continue
+
+        base = baseline[shape]
+
+        if base['instrs'] != result['instrs']:
+            print(
+                f'{shape}: sizes differ from the baseline, skipping',
+                file=sys.stderr
+            )
+            continue
+
+        for name, timing in result['stages'].items():
+            if name not in base['stages']:
+                continue
+
+            old = base['stages'][name]
+            elapsed, before = timing['seconds'][-1], old['seconds'][-1]
+
+            if elapsed - before > max(before * threshold, floor):
+                found.append(
+                    f'{shape} {name}: {elapsed * 1000:.3f} ms at '
+                    f'{result["instrs"][-1]} instrs, '
+                    f'baseline {before * 1000:.3f} ms'
+                )
+
+            measured = [
+                i for i, (new, old_time) in enumerate(
+                    zip(timing['seconds'], old['seconds'])
+                ) if min(new, old_time) >= floor
+            ]
+
+            if len(measured) < MIN_POINTS:
+                continue
+
+            sizes = [result['instrs'][i] for i in measured]
+            new_slope = slope(sizes, [timing['seconds'][i] for i in measured])
+            old_slope = slope(sizes, [old['seconds'][i] for i in measured])
+
+            if new_slope > old_slope + margin:
+                found.append(
+                    f'{shape} {name}: slope {new_slope:.2f}, '
+                    f'baseline {old_slope:.2f} over sizes above the floor'
+                )
+
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measures how analyses and passes scale on synthetic '
+                    'CFGs.'
+    )
+
+    parser.add_argument(
+        '--shapes',
+        nargs='+',
+        choices=SHAPES,
+        default=list(SHAPES)
+    )
+    parser.add_argument(
+        '--sizes',
+        nargs='+',
+        type=int,
+        default=[8, 16, 32]
+    )
+    parser.add_argument(
+        '--stages',
+        nargs='+',
+        choices=STAGES,
+        default=list(STAGES)
+    )
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=5
+    )
+    parser.add_argument(
+        '--processes',
+        type=int,
+        default=3,
+        help='fresh processes to run the suite in, keeping the fastest times'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=0
+    )
+    parser.add_argument(
+        '--save',
+        type=argparse.FileType('w'),
+        help='file to write the measurements to as JSON'
+    )
+    parser.add_argument(
+        '--baseline',
+        type=argparse.FileType('r'),
+        help='measurements from --save to check for regressions against'
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.5,
+        help='allowed relative slowdown at the largest size'
+    )
+    parser.add_argument(
+        '--slope-margin',
+        type=float,
+        default=0.25,
+        help='allowed increase of the fitted log-log slope'
+    )
+    parser.add_argument(
+        '--floor',
+        type=float,
+        default=1.0,
+        help='milliseconds of slowdown, or of time per size, below which '
+             'measurements are treated as noise'
+    )
+
+    args = parser.parse_args()
+
+    if args.baseline is not None and args.repeat < MIN_REPEAT:
+        parser.error(
+            f'--baseline needs --repeat {MIN_REPEAT} or more, since single '
+            'runs are too noisy to compare'
+        )
+
+    results = run_processes(
+        args.processes,
+        args.shapes,
+        sorted(args.sizes),
+        args.stages,
+        args.repeat,
+        args.seed
+    )
+
+    print_table(results)
+
+    if args.save is not None:
+        json.dump(results, args.save)
+        args.save.write('\n')
+
+    if args.baseline is not None:
+        found = regressions(
+            results,
+            json.load(args.baseline),
+            args.threshold,
+            args.slope_margin,
+            args.floor / 1000
+        )
+
+        for line in found:
+            print(f'regression: {line}', file=sys.stderr)
+
+        if found:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+import argparse
+import json
+import shutil
+import subprocess
+from time import perf_counter
+from typing import Callable
+
+from briltxt import dump, load_program, parse
+
+def best(run: Callable[[], object], repeat: int) -> float:
+    times: list[float] = []
+
+    for _ in range(repeat):
+        start = perf_counter()
+        run()
+        times.append(perf_counter() - start)
+
+    return min(times)
+
+def report(name: str, elapsed: float, size: int, instrs: int):
+    print(
+        f'{name:>12}: {elapsed * 1000:9.3f} ms '
+        f'{size / elapsed / 1e6:8.2f} MB/s '
+        f'{instrs / elapsed / 1e3:9.1f} kinstr/s'
+    )
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measures Bril text parsing and printing throughput.'
+    )
+
+    parser.add_argument(
+        'files',
+        nargs='+',
+        help='.bril or .json programs'
+    )
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=5
+    )
+
+    args = parser.parse_args()
+
+    progs = []
+
+    for file in args.files:
+        with open(file) as f:
+            progs.append(load_program(f.read()))
+
+    texts = [dump(prog) for prog in progs]
+    jsons = [json.dumps(prog) for prog in progs]
+
+    size = sum(map(len, texts))
+    instrs = sum(
+        len(func['instrs']) for prog in progs for func in prog['functions']
+    )
+
+    print(f'{len(progs)} programs, {instrs} items, {size} bytes of text')
+
+    report(
+        'parse',
+        best(lambda: [parse(text) for text in texts], args.repeat),
+        size,
+        instrs
+    )
+    report(
+        'print',
+        best(lambda: [dump(prog) for prog in progs], args.repeat),
+        size,
+        instrs
+    )
+    report(
+        'json.loads',
+        best(lambda: [json.loads(text) for text in jsons], args.repeat),
+        size,
+        instrs
+    )
+
+    for tool, inputs in (('bril2json', texts), ('bril2txt', jsons)):
+        if shutil.which(tool) is None:
+            print(f'{tool:>12}: not found')
+            continue
+
+        report(
+            tool,
+            best(
+                lambda: [
+                    subprocess.run(
+                        [tool],
+                        input=text,
+                        capture_output=True,
+                        text=True,
+                        check=True
+                    ) for text in inputs
+                ],
+                args.repeat
+            ),
+            size,
+            instrs
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,279 @@
+import json
+import re
+from typing import Any
+
+from syntax import (
+    Argument, Function, Instruction, Item, Literal, Program, Type
+)
+
+TOKEN = re.compile(r"'[^']'|[\w@.%+-]+|\S")
+COMMENT = re.compile(r"('[^']')|#[^\n]*")
+
+class ParseError(Exception):
+    pass
+
+def tokenize(text: str) -> list[str]:
+    if '#' in text:
+        text = COMMENT.sub(r'\1', text)
+
+    tokens = TOKEN.findall(text)
+    tokens.append('')
+
+    return tokens
+
+def is_ident(token: str) -> bool:
+    return token[:1].isalpha() or token[:1] in ('_', '%')
+
+class Parser:
+    def __init__(self, text: str):
+        self.tokens = tokenize(text)
+        self.pos = 0
+
+    def next(self) -> str:
+        token = self.tokens[self.pos]
+        self.pos += 1
+
+        return token
+
+    def accept(self, value: str) -> bool:
+        if self.tokens[self.pos] == value:
+            self.pos += 1
+
+            return True
+
+        return False
+
+    def expect(self, value: str):
+        token = self.next()
+
+        if token != value:
+            raise ParseError(f'expected {value!r}, got {token!r}')
+
+    def ident(self) -> str:
+        token = self.next()
+
+        if not is_ident(token):
+            raise ParseError(f'expected identifier, got {token!r}')
+
+        return token
+
+    def type(self) -> Type:
+        name = self.ident()
+
+        if self.accept('<'):
+            param = self.type()
+            self.expect('>')
+
+            return {name: param}
+
+        return name
+
+    def literal(self) -> Literal:
+        token = self.next()
+
+        if token in ('true', 'false'):
+            return token == 'true'
+
+        if len(token) == 3 and token[0] == token[2] == "'":
+            return token[1]  # type: ignore
+
+        try:
+            return int(token)
+        except ValueError:
+            pass
+
+        try:
+            return float(token)  # type: ignore
+        except ValueError:
+            raise ParseError(f'expected literal, got {token!r}') from None
+
+    def operation(self, op: str) -> Instruction:
+        args: list[str] = []
+        funcs: list[str] = []
+        labels: list[str] = []
+
+        while not self.accept(';'):
+            token = self.next()
+
+            if token[:1] == '@':
+                funcs.append(token[1:])
+            elif token[:1] == '.':
+                labels.append(token[1:])
+            elif is_ident(token):
+                args.append(token)
+            else:
+                raise ParseError(f'unexpected {token!r} in {op}')
+
+        instr: Instruction = {'op': op}
+
+        if args:
+            instr['args'] = args
+
+        if funcs:
+            instr['funcs'] = funcs
+
+        if labels:
+            instr['labels'] = labels
+
+        return instr
+
+    def item(self) -> Item:
+        token = self.next()
+
+        if token[:1] == '.':
+            self.expect(':')
+
+            return {'label': token[1:]}
+
+        if not is_ident(token):
+            raise ParseError(f'expected instruction, got {token!r}')
+
+        if self.tokens[self.pos] not in (':', '='):
+            return self.operation(token)
+
+        type = self.type() if self.accept(':') else None
+        self.expect('=')
+        op = self.ident()
+
+        if op == 'const':
+            instr: Instruction = {'op': 'const', 'dest': token}
+
+            if type is not None:
+                instr['type'] = type
+
+            instr['value'] = self.literal()
+            self.expect(';')
+
+            return instr
+
+        instr = self.operation(op)
+        instr['dest'] = token
+
+        if type is not None:
+            instr['type'] = type
+
+        return instr
+
+    def function(self) -> Function:
+        token = self.next()
+
+        if token[:1] != '@':
+            raise ParseError(f'expected function, got {token!r}')
+
+        args: list[Argument] = []
+
+        if self.accept('('):
+            while not self.accept(')'):
+                if args:
+                    self.expect(',')
+
+                arg = self.ident()
+                self.expect(':')
+                args.append({'name': arg, 'type': self.type()})
+
+        type = self.type() if self.accept(':') else None
+        self.expect('{')
+
+        instrs: list[Item] = []
+
+        while not self.accept('}'):
+            instrs.append(self.item())
+
+        func: Function = {'name': token[1:], 'instrs': instrs}
+
+        if args:
+            func['args'] = args
+
+        if type is not None:
+            func['type'] = type
+
+        return func
+
+    def program(self) -> Program:
+        functions: list[Function] = []
+
+        while self.tokens[self.pos]:
+            functions.append(self.function())
+
+        return {'functions': functions}
+
+def parse(text: str) -> Program:
+    return Parser(text).program()
+
+def load_program(text: str) -> Program:
+    if text.lstrip().startswith('{'):
+        return json.loads(text)
+
+    return parse(text)
+
+def type_to_str(type: Type) -> str:
+    if isinstance(type, dict):
+        assert len(type) == 1
+
+        (name, param), = type.items()
+
+        return f'{name}<{type_to_str(param)}>'
+
+    return type
+
+def value_to_str(type: Type, value: Any) -> str:
+    if type == 'char':
+        return f"'{value}'"
+
+    return str(value).lower()
+
+def instr_to_str(instr: Instruction) -> str:
+    if 'type' in instr:
+        tyann = f': {type_to_str(instr["type"])}'
+    else:
+        tyann = ''
+
+    if instr['op'] == 'const':
+        assert 'type' in instr
+        assert 'value' in instr
+
+        value = value_to_str(instr['type'], instr['value'])
+
+        return f'{instr.get("dest")}{tyann} = const {value}'
+
+    rhs = [instr['op']]
+    rhs.extend(f'@{func}' for func in instr.get('funcs', []))
+    rhs.extend(instr.get('args', []))
+    rhs.extend(f'.{label}' for label in instr.get('labels', []))
+
+    if 'dest' in instr:
+        return f'{instr["dest"]}{tyann} = {" ".join(rhs)}'
+
+    return ' '.join(rhs)
+
+def func_to_str(func: Function) -> str:
+    lines: list[str] = []
+
+    args = ', '.join(
+        f'{arg["name"]}: {type_to_str(arg["type"])}'
+            for arg in func.get('args', [])
+    )
+    type = func.get('type')
+
+    header = f'@{func["name"]}'
+
+    if args:
+        header += f'({args})'
+
+    if type is not None:
+        header += f': {type_to_str(type)}'
+
+    lines.append(header + ' {')
+
+    for item in func['instrs']:
+        if 'label' in item:
+            lines.append(f'.{item["label"]}:')
+        else:
+            lines.append(f'  {instr_to_str(item)};')  # type: ignore
+
+    lines.append('}')
+
+    return '\n'.join(lines)
+
+def dump(prog: Program) -> str:
+    return ''.join(func_to_str(func) + '\n' for func in prog['functions'])
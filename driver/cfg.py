@@ -0,0 +1 @@
+../task04/cfg.py
\ No newline at end of file
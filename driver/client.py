@@ -0,0 +1,94 @@
+import argparse
+import json
+import os
+import socket
+import sys
+
+from passes import pass_list
+
+DEFAULT_SOCKET = os.environ.get(
+    'BRIL_DRIVER_SOCKET',
+    f'/tmp/bril-driver-{os.getuid()}.sock'
+)
+
+def request(path: str, header: dict, prog: str) -> tuple[bool, str]:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall(json.dumps(header).encode() + b'\n' + prog.encode())
+        sock.shutdown(socket.SHUT_WR)
+
+        with sock.makefile('rb') as f:
+            status = f.readline().strip()
+            body = f.read().decode()
+
+    return status == b'ok', body
+
+def run_locally(header: dict, prog: str) -> tuple[bool, str]:
+    from briltxt import load_program
+    from driver import optimize_prog
+
+    program = load_program(prog)
+    optimize_prog(
+        program,
+        header['passes'],
+        header['func'],
+        header['trace']
+    )
+
+    return True, json.dumps(program)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Runs a pipeline of passes on the optimizer server.'
+    )
+
+    parser.add_argument(
+        'file',
+        nargs='?',
+        type=argparse.FileType('r'),
+        default=sys.stdin
+    )
+    parser.add_argument(
+        '--passes',
+        type=pass_list,
+        action='extend',
+        required=True,
+        help='comma-separated passes to run in order, may be repeated'
+    )
+    parser.add_argument(
+        '--trace',
+        type=argparse.FileType('r')
+    )
+    parser.add_argument(
+        '--func'
+    )
+    parser.add_argument(
+        '--socket',
+        default=DEFAULT_SOCKET
+    )
+
+    args = parser.parse_args()
+
+    if 'stitch' in args.passes and (args.trace is None or args.func is None):
+        parser.error('stitch requires --trace and --func')
+
+    header = {
+        'passes': args.passes,
+        'func': args.func,
+        'trace': json.load(args.trace) if args.trace is not None else None
+    }
+    prog = args.file.read()
+
+    try:
+        ok, body = request(args.socket, header, prog)
+    except (FileNotFoundError, ConnectionRefusedError):
+        ok, body = run_locally(header, prog)
+
+    if not ok:
+        print(body, file=sys.stderr, end='')
+        sys.exit(1)
+
+    sys.stdout.write(body)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+../task04/dfa.py
\ No newline at end of file
@@ -0,0 +1 @@
+../task05/dom.py
\ No newline at end of file
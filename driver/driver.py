@@ -0,0 +1,412 @@
+import argparse
+import io
+import json
+import sys
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from time import perf_counter
+from typing import Any, Callable, Iterable, Iterator, Optional, TextIO
+
+from briltxt import dump, func_to_str, load_program
+from ircache import IRCache
+from jsonstream import read_program, write_program
+from licm import licm_func
+from lvn import lvn_func
+from memo import DEFAULT_LIMIT, function_key, pipeline_key, ResultCache
+from nofree import nofree_func
+from passes import pass_list
+from revbr import visit_function
+from ssa import ssa_func
+from stats import active, disable, enable, Report, timed
+from stitch import stitch_func
+from syntax import Function, Program
+from tdce import tdce_func
+
+Pass = Callable[[Function], None]
+
+def get_pass(name: str, target: Optional[str], trace: Any) -> Pass:
+    return {
+        'revbr': visit_function,
+        'tdce': tdce_func,
+        'lvn': lvn_func,
+        'ssa': ssa_func,
+        'ssa-roundtrip': lambda f: ssa_func(f, roundtrip=True),
+        'licm': licm_func,
+        'nofree': nofree_func,
+        'stitch': lambda f: stitch_func(f, target, trace)
+    }[name]
+
+def optimize(
+    func: Function,
+    names: list[str],
+    target: Optional[str],
+    trace: Any
+) -> tuple[Function, dict[str, float]]:
+    timings: dict[str, float] = {}
+
+    for name in names:
+        run = get_pass(name, target, trace)
+
+        start = perf_counter()
+
+        with timed(f'pass.{name}'):
+            run(func)
+
+        timings[name] = timings.get(name, 0.0) + perf_counter() - start
+
+    return func, timings
+
+def optimize_collect(
+    func: Function,
+    names: list[str],
+    target: Optional[str],
+    trace: Any,
+    memory: bool
+) -> tuple[Function, dict[str, float], Report]:
+    enable(memory)
+
+    try:
+        func, timings = optimize(func, names, target, trace)
+    finally:
+        stats = disable()
+
+    assert stats is not None
+
+    return func, timings, stats.report()
+
+def submit(
+    pool: Executor,
+    func: Function,
+    names: list[str],
+    target: Optional[str],
+    trace: Any
+) -> Future:
+    stats = active()
+
+    if stats is None:
+        return pool.submit(optimize, func, names, target, trace)
+
+    return pool.submit(
+        optimize_collect, func, names, target, trace, stats.memory
+    )
+
+def collect(result: tuple) -> tuple[Function, dict[str, float]]:
+    if len(result) == 3:
+        stats = active()
+        assert stats is not None
+
+        stats.absorb(result[2])
+
+    return result[0], result[1]
+
+def merge(timings: dict[str, float], other: dict[str, float]):
+    for name, elapsed in other.items():
+        timings[name] = timings.get(name, 0.0) + elapsed
+
+def optimize_prog(
+    prog: Program,
+    names: list[str],
+    target: Optional[str],
+    trace: Any,
+    jobs: int = 1,
+    memo: Optional[ResultCache] = None
+) -> dict[str, float]:
+    funcs = prog['functions']
+    timings = {name: 0.0 for name in names}
+    pending = list(range(len(funcs)))
+    keys: dict[int, str] = {}
+
+    if memo is not None:
+        pipeline = pipeline_key(names, target, trace)
+        pending = []
+
+        for i, func in enumerate(funcs):
+            keys[i] = function_key(func, pipeline)
+            cached = memo.get(keys[i])
+
+            if cached is not None:
+                funcs[i] = cached
+            else:
+                pending.append(i)
+
+    if jobs <= 1 or len(pending) <= 1:
+        for i in pending:
+            merge(timings, optimize(funcs[i], names, target, trace)[1])
+    else:
+        order = sorted(
+            pending,
+            key=lambda i: len(funcs[i]['instrs']),
+            reverse=True
+        )
+
+        with ProcessPoolExecutor(jobs) as pool:
+            futures = {
+                i: submit(pool, funcs[i], names, target, trace)
+                    for i in order
+            }
+
+            for i, future in futures.items():
+                funcs[i], func_timings = collect(future.result())
+                merge(timings, func_timings)
+
+    if memo is not None:
+        for i in pending:
+            memo.put(keys[i], funcs[i])
+
+    return timings
+
+def optimize_stream(
+    funcs: Iterable[Function],
+    names: list[str],
+    target: Optional[str],
+    trace: Any,
+    timings: dict[str, float],
+    jobs: int = 1,
+    memo: Optional[ResultCache] = None
+) -> Iterator[Function]:
+    pipeline = pipeline_key(names, target, trace) if memo is not None else ''
+    pool = ProcessPoolExecutor(jobs) if jobs > 1 else None
+    window: deque[tuple[Optional[str], Any]] = deque()
+
+    def finish() -> Function:
+        key, result = window.popleft()
+
+        if isinstance(result, Future):
+            result = result.result()
+
+        if key is None:
+            return result
+
+        func, func_timings = collect(result)
+        merge(timings, func_timings)
+
+        if memo is not None:
+            memo.put(key, func)
+
+        return func
+
+    try:
+        for func in funcs:
+            key = function_key(func, pipeline) if memo is not None else ''
+            cached = memo.get(key) if memo is not None else None
+
+            if cached is not None:
+                window.append((None, cached))
+            elif pool is not None:
+                window.append(
+                    (key, submit(pool, func, names, target, trace))
+                )
+            else:
+                window.append((key, optimize(func, names, target, trace)))
+
+            while len(window) > 2 * jobs:
+                yield finish()
+
+        while window:
+            yield finish()
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+def input_fields(
+    file: TextIO,
+    cache: Optional[str]
+) -> Iterator[tuple[str, Any]]:
+    if cache is None:
+        yield from read_program(file)
+
+        return
+
+    text = file.read()
+    program = IRCache(cache).open(text)
+
+    if program is None:
+        yield from read_program(io.StringIO(text))
+
+        return
+
+    with program:
+        yield from program.fields()
+
+def stream_prog(
+    fields: Iterable[tuple[str, Any]],
+    out: TextIO,
+    names: list[str],
+    target: Optional[str],
+    trace: Any,
+    text: bool,
+    timings: dict[str, float],
+    jobs: int = 1,
+    memo: Optional[ResultCache] = None
+):
+    fields = (
+        (key, optimize_stream(
+            value, names, target, trace, timings, jobs, memo
+        ) if key == 'functions' else value)
+            for key, value in fields
+    )
+
+    if not text:
+        write_program(fields, out)
+
+        return
+
+    for key, value in fields:
+        if key == 'functions':
+            for func in value:
+                out.write(func_to_str(func) + '\n')
+                out.flush()
+
+def optimize_whole(
+    args: argparse.Namespace,
+    timings: dict[str, float],
+    memo: Optional[ResultCache]
+):
+    start = perf_counter()
+
+    with timed('io.parse'):
+        if args.cache is not None:
+            prog = IRCache(args.cache).program(args.file.read())
+        else:
+            prog = load_program(args.file.read())
+
+        trace = json.load(args.trace) if args.trace is not None else None
+
+    timings['parse'] = perf_counter() - start
+
+    merge(
+        timings,
+        optimize_prog(prog, args.passes, args.func, trace, args.jobs, memo)
+    )
+
+    start = perf_counter()
+
+    with timed('io.dump'):
+        if args.text:
+            sys.stdout.write(dump(prog))
+        else:
+            json.dump(prog, sys.stdout)
+
+    timings['dump'] = perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Runs a pipeline of passes in a single process.'
+    )
+
+    parser.add_argument(
+        'file',
+        nargs='?',
+        type=argparse.FileType('r'),
+        default=sys.stdin
+    )
+    parser.add_argument(
+        '--passes',
+        type=pass_list,
+        action='extend',
+        required=True,
+        help='comma-separated passes to run in order, may be repeated'
+    )
+    parser.add_argument(
+        '--trace',
+        type=argparse.FileType('r')
+    )
+    parser.add_argument(
+        '--func'
+    )
+    parser.add_argument(
+        '--text',
+        action='store_true'
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=1
+    )
+    parser.add_argument(
+        '--time',
+        action='store_true'
+    )
+    parser.add_argument(
+        '--cache',
+        help='directory of binary IR for .bril text inputs, keyed by '
+             'content hash'
+    )
+    parser.add_argument(
+        '--memo',
+        help='directory of optimized functions keyed by content hash'
+    )
+    parser.add_argument(
+        '--memo-limit',
+        type=int,
+        default=DEFAULT_LIMIT,
+        help='bytes to keep in the --memo directory'
+    )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='optimize and write each function as soon as it is read'
+    )
+    parser.add_argument(
+        '--stats',
+        type=argparse.FileType('w'),
+        help='file to write pass and analysis statistics to as JSON'
+    )
+    parser.add_argument(
+        '--memory',
+        action='store_true',
+        help='also record peak allocations in --stats (slow)'
+    )
+
+    args = parser.parse_args()
+
+    if 'stitch' in args.passes and (args.trace is None or args.func is None):
+        parser.error('stitch requires --trace and --func')
+
+    timings: dict[str, float] = {}
+    memo = None
+
+    if args.stats is not None:
+        enable(args.memory)
+
+    if args.memo is not None:
+        memo = ResultCache(args.memo, args.memo_limit)
+
+    if args.stream:
+        trace = json.load(args.trace) if args.trace is not None else None
+
+        start = perf_counter()
+
+        with timed('io.stream'):
+            stream_prog(
+                input_fields(args.file, args.cache),
+                sys.stdout,
+                args.passes,
+                args.func,
+                trace,
+                args.text,
+                timings,
+                args.jobs,
+                memo
+            )
+
+        timings['stream'] = perf_counter() - start
+    else:
+        optimize_whole(args, timings, memo)
+
+    if args.time:
+        for name, elapsed in timings.items():
+            print(f'{name}: {elapsed * 1000:.3f} ms', file=sys.stderr)
+
+    if memo is not None:
+        memo.prune()
+        print(memo.report(), file=sys.stderr)
+
+    stats = disable()
+
+    if stats is not None:
+        json.dump(stats.report(), args.stats)
+        args.stats.write('\n')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,339 @@
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from time import perf_counter
+from typing import Any, Iterator, Optional
+
+from briltxt import load_program
+from ir import CompactFunction, from_func, Interner, OPCODES, SHAPES
+from ir import to_func, type_key
+from syntax import Function, Program
+
+MAGIC = b'BRIR'
+VERSION = 2
+
+HEADER = struct.Struct('<4sIII')
+ENTRY = struct.Struct('<QQ')
+LENGTH = struct.Struct('<I')
+
+COLUMNS = (
+    'ops',
+    'dests',
+    'type_ids',
+    'shapes',
+    'arg_offsets',
+    'arg_ids',
+    'func_offsets',
+    'func_ids',
+    'label_offsets',
+    'label_ids',
+    'block_starts'
+)
+
+def frame(data: bytes) -> bytes:
+    return LENGTH.pack(len(data)) + data
+
+def is_json(text: str) -> bool:
+    return text.lstrip().startswith('{')
+
+def encode_function(func: Function) -> bytes:
+    compact = from_func(func)
+
+    meta = {
+        'name': compact.name,
+        'keys': compact.keys,
+        'attrs': compact.attrs,
+        'params': compact.params,
+        'type': compact.type,
+        'vars': compact.vars.keys,
+        'labels': compact.labels.keys,
+        'funcs': compact.funcs.keys,
+        'types': compact.type_values,
+        'values': list(compact.values.items()),
+        'extras': list(compact.extras.items())
+    }
+
+    columns = [getattr(compact, name) for name in COLUMNS]
+
+    return frame(json.dumps(meta).encode()) + b''.join(
+        frame(column.tobytes()) for column in columns
+    )
+
+def write_program(prog: Program, path: str):
+    funcs = [encode_function(func) for func in prog['functions']]
+    meta = json.dumps({
+        'names': [func['name'] for func in prog['functions']],
+        'keys': list(prog),
+        'attrs': {key: prog[key] for key in prog if key != 'functions'},
+        'opcodes': OPCODES.keys,
+        'shapes': SHAPES.keys,
+        'byteorder': sys.byteorder
+    }).encode()
+
+    offset = HEADER.size + ENTRY.size * len(funcs) + len(meta)
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(funcs), len(meta)))
+
+        for func in funcs:
+            f.write(ENTRY.pack(offset, len(func)))
+            offset += len(func)
+
+        f.write(meta)
+
+        for func in funcs:
+            f.write(func)
+
+def interner(keys: list[Any]) -> Interner[Any]:
+    table: Interner[Any] = Interner()
+
+    for key in keys:
+        table.intern(key)
+
+    return table
+
+def translate(column: array, remap: list[int]) -> array:
+    if all(i == new for i, new in enumerate(remap)):
+        return column
+
+    return array('i', [remap[i] if i >= 0 else i for i in column])
+
+class ProgramFile:
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'rb')
+
+        try:
+            self.map = mmap.mmap(
+                self.file.fileno(),
+                0,
+                access=mmap.ACCESS_READ
+            )
+        except BaseException:
+            self.file.close()
+
+            raise
+
+        try:
+            magic, version, count, size = HEADER.unpack_from(self.map, 0)
+        except struct.error:
+            self.close()
+
+            raise ValueError(f'{path}: truncated IR file')
+
+        if magic != MAGIC or version != VERSION:
+            self.close()
+
+            raise ValueError(f'{path}: not a version {VERSION} IR file')
+
+        start = HEADER.size + ENTRY.size * count
+
+        self.entries = [
+            ENTRY.unpack_from(self.map, HEADER.size + ENTRY.size * i)
+                for i in range(count)
+        ]
+        self.meta = json.loads(self.map[start:start + size])
+        self.names: list[str] = self.meta['names']
+        self.opcodes = [OPCODES.intern(op) for op in self.meta['opcodes']]
+        self.shapes = [
+            SHAPES.intern(tuple(shape)) for shape in self.meta['shapes']
+        ]
+        self.swap = self.meta['byteorder'] != sys.byteorder
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self) -> 'ProgramFile':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def record(self, i: int) -> tuple[dict[str, Any], dict[str, array]]:
+        offset, length = self.entries[i]
+        end = offset + length
+        frames: list[bytes] = []
+
+        while offset < end:
+            size, = LENGTH.unpack_from(self.map, offset)
+            offset += LENGTH.size
+            frames.append(self.map[offset:offset + size])
+            offset += size
+
+        meta = json.loads(frames[0])
+        columns: dict[str, array] = {}
+
+        for name, data in zip(COLUMNS, frames[1:]):
+            column = array('i')
+            column.frombytes(data)
+
+            if self.swap:
+                column.byteswap()
+
+            columns[name] = column
+
+        return meta, columns
+
+    def decode(
+        self,
+        meta: dict[str, Any],
+        columns: dict[str, array]
+    ) -> CompactFunction:
+        compact = CompactFunction(meta['name'])
+        compact.keys = tuple(meta['keys'])
+        compact.attrs = meta['attrs']
+        compact.params = meta['params']
+        compact.type = meta['type']
+
+        compact.vars = interner(meta['vars'])
+        compact.labels = interner(meta['labels'])
+        compact.funcs = interner(meta['funcs'])
+        compact.types = interner([type_key(type) for type in meta['types']])
+        compact.type_values = meta['types']
+
+        compact.values = {i: value for i, value in meta['values']}
+        compact.extras = {i: extra for i, extra in meta['extras']}
+
+        for name in COLUMNS:
+            setattr(compact, name, columns[name])
+
+        compact.ops = translate(compact.ops, self.opcodes)
+        compact.shapes = translate(compact.shapes, self.shapes)
+
+        return compact
+
+    def function(self, i: int) -> CompactFunction:
+        return self.decode(*self.record(i))
+
+    def func(self, i: int) -> Function:
+        return to_func(self.function(i))
+
+    def functions(self) -> Iterator[Function]:
+        for i in range(len(self)):
+            yield self.func(i)
+
+    def fields(self) -> Iterator[tuple[str, Any]]:
+        for key in self.meta['keys']:
+            if key == 'functions':
+                yield key, self.functions()
+            else:
+                yield key, self.meta['attrs'][key]
+
+    def program(self) -> Program:
+        return {  # type: ignore
+            key: list(value) if key == 'functions' else value
+                for key, value in self.fields()
+        }
+
+class IRCache:
+    def __init__(self, dir: str):
+        self.dir = dir
+
+        os.makedirs(dir, exist_ok=True)
+
+    def path(self, text: str) -> str:
+        digest = hashlib.sha256(text.encode()).hexdigest()
+
+        return os.path.join(self.dir, f'{digest}.brir')
+
+    def load(self, text: str) -> Optional[ProgramFile]:
+        try:
+            return ProgramFile(self.path(text))
+        except (FileNotFoundError, ValueError, struct.error):
+            return None
+
+    def store(self, text: str, prog: Program):
+        fd, temp = tempfile.mkstemp(dir=self.dir, suffix='.tmp')
+        os.close(fd)
+
+        try:
+            write_program(prog, temp)
+            os.replace(temp, self.path(text))
+        except BaseException:
+            os.unlink(temp)
+
+            raise
+
+    def open(self, text: str) -> Optional[ProgramFile]:
+        if is_json(text):
+            return None
+
+        file = self.load(text)
+
+        if file is None:
+            self.store(text, load_program(text))
+            file = self.load(text)
+
+        return file
+
+    def program(self, text: str) -> Program:
+        if is_json(text):
+            return json.loads(text)
+
+        file = self.load(text)
+
+        if file is not None:
+            with file:
+                return file.program()
+
+        prog = load_program(text)
+        self.store(text, prog)
+
+        return prog
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Fills the binary IR cache and compares reload times.'
+    )
+
+    parser.add_argument(
+        'files',
+        nargs='+',
+        help='.bril or .json programs'
+    )
+    parser.add_argument(
+        '--cache',
+        required=True,
+        help='cache directory'
+    )
+
+    args = parser.parse_args()
+    cache = IRCache(args.cache)
+
+    for name in args.files:
+        with open(name) as f:
+            text = f.read()
+
+        start = perf_counter()
+        prog = load_program(text)
+        parse = perf_counter() - start
+
+        cache.store(text, prog)
+
+        start = perf_counter()
+        file = cache.load(text)
+        assert file is not None
+
+        with file:
+            file.program()
+
+        load = perf_counter() - start
+
+        print(
+            f'{name}: parse {parse * 1000:.3f} ms, '
+            f'cached {load * 1000:.3f} ms, '
+            f'{os.path.getsize(cache.path(text))} bytes'
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+import json
+from typing import Any, Iterable, Iterator, TextIO
+
+from syntax import Function
+
+CHUNK = 1 << 16
+WHITESPACE = ' \t\n\r'
+
+class Reader:
+    def __init__(self, file: TextIO, chunk: int = CHUNK):
+        self.file = file
+        self.chunk = chunk
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def fill(self) -> bool:
+        if self.eof:
+            return False
+
+        rest = self.buf[self.pos:]
+        data = self.file.read(max(self.chunk, len(rest)))
+
+        if not data:
+            self.eof = True
+
+            return False
+
+        self.buf = rest + data
+        self.pos = 0
+
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+
+            if self.pos < len(self.buf) or not self.fill():
+                return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f'expected {char!r}', self.buf, self.pos)
+
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+
+                continue
+
+            if (end == len(self.buf) and self.buf[end - 1].isdigit()
+                    and self.fill()):
+                continue
+
+            self.pos = end
+
+            return value
+
+    def functions(self) -> Iterator[Function]:
+        self.expect('[')
+
+        if self.peek() == ']':
+            self.pos += 1
+
+            return
+
+        while True:
+            yield self.value()
+
+            if self.peek() == ']':
+                self.pos += 1
+
+                return
+
+            self.expect(',')
+
+def read_program(file: TextIO) -> Iterator[tuple[str, Any]]:
+    reader = Reader(file)
+    reader.expect('{')
+
+    if reader.peek() == '}':
+        return
+
+    while True:
+        key = reader.value()
+        reader.expect(':')
+
+        if key == 'functions':
+            yield key, reader.functions()
+        else:
+            yield key, reader.value()
+
+        if reader.peek() == '}':
+            return
+
+        reader.expect(',')
+
+def write_program(fields: Iterable[tuple[str, Any]], out: TextIO):
+    out.write('{')
+
+    for i, (key, value) in enumerate(fields):
+        if i > 0:
+            out.write(', ')
+
+        out.write(f'{json.dumps(key)}: ')
+
+        if key != 'functions':
+            out.write(json.dumps(value))
+            continue
+
+        out.write('[')
+
+        for j, func in enumerate(value):
+            if j > 0:
+                out.write(', ')
+
+            out.write(json.dumps(func))
+            out.flush()
+
+        out.write(']')
+
+    out.write('}')
+    out.flush()
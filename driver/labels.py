@@ -0,0 +1 @@
+../task06/labels.py
\ No newline at end of file
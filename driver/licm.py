@@ -0,0 +1 @@
+../task08/licm.py
\ No newline at end of file
@@ -0,0 +1 @@
+../task04/lva.py
\ No newline at end of file
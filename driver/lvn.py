@@ -0,0 +1 @@
+../task03/lvn.py
\ No newline at end of file
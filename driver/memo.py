@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import tempfile
+from functools import cache
+from typing import Any, Optional
+
+from stats import count
+from syntax import Function
+
+DEFAULT_LIMIT = 256 * 1024 * 1024
+
+@cache
+def tool_version() -> str:
+    here = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+
+    for name in sorted(os.listdir(here)):
+        if name.endswith('.py'):
+            with open(os.path.join(here, name), 'rb') as f:
+                digest.update(name.encode() + b'\0' + f.read() + b'\0')
+
+    return digest.hexdigest()
+
+def pipeline_key(names: list[str], target: Optional[str], trace: Any) -> str:
+    return json.dumps(
+        [tool_version(), names, target, trace],
+        sort_keys=True
+    )
+
+def function_key(func: Function, pipeline: str) -> str:
+    canonical = json.dumps(func, sort_keys=True, separators=(',', ':'))
+
+    return hashlib.sha256(
+        pipeline.encode() + b'\0' + canonical.encode()
+    ).hexdigest()
+
+class ResultCache:
+    def __init__(self, dir: str, limit: int = DEFAULT_LIMIT):
+        self.dir = dir
+        self.limit = limit
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(dir, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.dir, f'{key}.json')
+
+    def get(self, key: str) -> Optional[Function]:
+        path = self.path(key)
+
+        try:
+            with open(path) as f:
+                func = json.load(f)
+
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            count('memo.misses')
+
+            return None
+
+        self.hits += 1
+        count('memo.hits')
+
+        return func
+
+    def put(self, key: str, func: Function):
+        fd, temp = tempfile.mkstemp(dir=self.dir, suffix='.tmp')
+
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(func, f)
+
+            os.replace(temp, self.path(key))
+        except BaseException:
+            os.unlink(temp)
+
+            raise
+
+    def prune(self):
+        entries: list[tuple[float, int, str]] = []
+
+        with os.scandir(self.dir) as it:
+            for entry in it:
+                if entry.name.endswith('.json'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+
+        for _, size, path in entries:
+            if total <= self.limit:
+                break
+
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+            total -= size
+
+    def report(self) -> str:
+        return f'memo: {self.hits} hits, {self.misses} misses'
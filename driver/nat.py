@@ -0,0 +1 @@
+../task08/nat.py
\ No newline at end of file
@@ -0,0 +1 @@
+../task11/test/nofree.py
\ No newline at end of file
@@ -0,0 +1,23 @@
+import argparse
+
+PASSES = (
+    'revbr',
+    'tdce',
+    'lvn',
+    'ssa',
+    'ssa-roundtrip',
+    'licm',
+    'nofree',
+    'stitch'
+)
+
+def pass_list(text: str) -> list[str]:
+    names = [name for name in text.split(',') if name]
+
+    for name in names:
+        if name not in PASSES:
+            raise argparse.ArgumentTypeError(
+                f'invalid choice: {name!r} (choose from {", ".join(PASSES)})'
+            )
+
+    return names
@@ -0,0 +1 @@
+../task08/rda.py
\ No newline at end of file
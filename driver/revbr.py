@@ -0,0 +1 @@
+../task02/revbr.py
\ No newline at end of file
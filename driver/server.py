@@ -0,0 +1,71 @@
+import argparse
+import json
+import os
+import signal
+import socketserver
+import traceback
+
+from briltxt import load_program
+from client import DEFAULT_SOCKET
+from driver import optimize_prog
+from passes import PASSES
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            header = json.loads(self.rfile.readline())
+            prog = load_program(self.rfile.read().decode())
+
+            for name in header['passes']:
+                if name not in PASSES:
+                    raise ValueError(f'unknown pass: {name}')
+
+            if 'stitch' in header['passes'] and (
+                header.get('trace') is None or header.get('func') is None
+            ):
+                raise ValueError('stitch requires --trace and --func')
+
+            optimize_prog(
+                prog,
+                header['passes'],
+                header.get('func'),
+                header.get('trace')
+            )
+
+            body = json.dumps(prog)
+        except Exception:
+            self.wfile.write(b'error\n' + traceback.format_exc().encode())
+        else:
+            self.wfile.write(b'ok\n' + body.encode())
+
+class Server(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    pass
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Serves pass pipelines over a Unix domain socket.'
+    )
+
+    parser.add_argument(
+        '--socket',
+        default=DEFAULT_SOCKET
+    )
+
+    args = parser.parse_args()
+
+    if os.path.exists(args.socket):
+        os.unlink(args.socket)
+
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    with Server(args.socket, Handler) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if os.path.exists(args.socket):
+                os.unlink(args.socket)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+../task06/ssa.py
\ No newline at end of file
@@ -0,0 +1 @@
+../task12/stitch.py
\ No newline at end of file
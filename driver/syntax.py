@@ -0,0 +1 @@
+../task03/syntax.py
\ No newline at end of file
@@ -0,0 +1,229 @@
+import argparse
+import json
+import random
+import sys
+from typing import Callable
+
+from syntax import Function, Instruction, Item, Program
+
+class Builder:
+    def __init__(self, vars: int, seed: int):
+        self.random = random.Random(seed)
+        self.vars = [f'v{i}' for i in range(vars)]
+        self.items: list[Item] = []
+        self.labels = 0
+        self.temps = 0
+
+    def label(self) -> str:
+        self.labels += 1
+
+        return f'l{self.labels}'
+
+    def temp(self) -> str:
+        self.temps += 1
+
+        return f't{self.temps}'
+
+    def emit(self, item: Item):
+        self.items.append(item)
+
+    def place(self, label: str):
+        self.emit({'label': label})
+
+    def const(self, dest: str, value: int):
+        self.emit({'op': 'const', 'dest': dest, 'type': 'int', 'value': value})
+
+    def binary(self, op: str, dest: str, lhs: str, rhs: str):
+        self.emit({
+            'op': op,
+            'dest': dest,
+            'type': 'int',
+            'args': [lhs, rhs]
+        })
+
+    def jmp(self, label: str):
+        self.emit({'op': 'jmp', 'labels': [label]})
+
+    def branch(self, then: str, otherwise: str):
+        cond = self.temp()
+        lhs = self.random.choice(self.vars)
+        rhs = self.random.choice(self.vars)
+
+        self.emit({
+            'op': 'lt',
+            'dest': cond,
+            'type': 'bool',
+            'args': [lhs, rhs]
+        })
+        self.emit({'op': 'br', 'args': [cond], 'labels': [then, otherwise]})
+
+    def work(self, count: int):
+        for _ in range(count):
+            op = self.random.choice(('add', 'mul', 'sub'))
+            dest = self.random.choice(self.vars)
+            lhs = self.random.choice(self.vars)
+            rhs = self.random.choice(self.vars)
+
+            if self.random.random() < 0.3:
+                invariant = self.temp()
+                self.const(invariant, self.random.randint(1, 9))
+                rhs = invariant
+
+            self.binary(op, dest, lhs, rhs)
+
+    def function(self, name: str) -> Function:
+        prologue: list[Item] = []
+
+        for i, var in enumerate(self.vars):
+            prologue.append({
+                'op': 'const',
+                'dest': var,
+                'type': 'int',
+                'value': i
+            })
+
+        epilogue: list[Instruction] = [
+            {'op': 'print', 'args': [var]} for var in self.vars
+        ]
+
+        return {'name': name, 'instrs': [*prologue, *self.items, *epilogue]}
+
+def counted_loop(builder: Builder, body: Callable[[], None]):
+    i, limit, one, cond = (builder.temp() for _ in range(4))
+    header, inside, exit = builder.label(), builder.label(), builder.label()
+
+    builder.const(i, 0)
+    builder.place(header)
+    builder.const(limit, 3)
+    builder.emit({
+        'op': 'lt',
+        'dest': cond,
+        'type': 'bool',
+        'args': [i, limit]
+    })
+    builder.emit({'op': 'br', 'args': [cond], 'labels': [inside, exit]})
+    builder.place(inside)
+    body()
+    builder.const(one, 1)
+    builder.binary('add', i, i, one)
+    builder.jmp(header)
+    builder.place(exit)
+
+def loops(builder: Builder, size: int):
+    def nest(depth: int):
+        builder.work(2)
+
+        if depth < size:
+            counted_loop(builder, lambda: nest(depth + 1))
+
+        builder.work(2)
+
+    nest(0)
+
+def diamonds(builder: Builder, size: int):
+    join = builder.label()
+
+    def fan(arms: int):
+        if arms == 1:
+            builder.work(2)
+            builder.jmp(join)
+
+            return
+
+        left, right = builder.label(), builder.label()
+        builder.branch(left, right)
+        builder.place(left)
+        fan(arms // 2)
+        builder.place(right)
+        fan(arms - arms // 2)
+
+    fan(max(size, 1))
+    builder.place(join)
+    builder.work(2)
+
+def chain(builder: Builder, size: int):
+    for _ in range(size):
+        label = builder.label()
+
+        builder.work(3)
+        builder.jmp(label)
+        builder.place(label)
+
+def irreducible(builder: Builder, size: int):
+    for _ in range(size):
+        first, second, exit = builder.label(), builder.label(), builder.label()
+
+        builder.branch(first, second)
+        builder.place(first)
+        builder.work(2)
+        builder.jmp(second)
+        builder.place(second)
+        builder.work(2)
+        builder.branch(first, exit)
+        builder.place(exit)
+
+def variables(builder: Builder, size: int):
+    counted_loop(builder, lambda: builder.work(4 * len(builder.vars)))
+
+SHAPES: dict[str, Callable[[Builder, int], None]] = {
+    'loops': loops,
+    'diamonds': diamonds,
+    'chain': chain,
+    'irreducible': irreducible,
+    'variables': variables
+}
+
+def synthesize(
+    shape: str,
+    size: int,
+    vars: int = 8,
+    seed: int = 0
+) -> Function:
+    if shape == 'variables':
+        vars = max(size, 1)
+
+    builder = Builder(vars, seed)
+    SHAPES[shape](builder, size)
+
+    return builder.function(f'{shape}{size}')
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generates synthetic Bril programs with large CFGs.'
+    )
+
+    parser.add_argument(
+        'shape',
+        choices=SHAPES
+    )
+    parser.add_argument(
+        'sizes',
+        nargs='+',
+        type=int,
+        help='loop depth, diamond width, chain length, irreducible regions '
+             'or variable count'
+    )
+    parser.add_argument(
+        '--vars',
+        type=int,
+        default=8
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=0
+    )
+
+    args = parser.parse_args()
+
+    prog: Program = {
+        'functions': [
+            synthesize(args.shape, size, args.vars, args.seed)
+                for size in args.sizes
+        ]
+    }
+
+    json.dump(prog, sys.stdout)
+
+if __name__ == '__main__':
+    main()
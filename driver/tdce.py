@@ -0,0 +1 @@
+../task03/tdce.py
\ No newline at end of file
@@ -0,0 +1,75 @@
+import gc
+import json
+import os
+import sys
+import tempfile
+import warnings
+
+from briltxt import dump, load_program
+from ircache import IRCache, ProgramFile, write_program
+from syntax import Program
+
+def check_file(prog: Program, dir: str):
+    path = os.path.join(dir, 'prog.brir')
+    write_program(prog, path)
+
+    with ProgramFile(path) as file:
+        assert file.names == [func['name'] for func in prog['functions']]
+        assert list(file.functions()) == prog['functions']
+        assert file.program() == prog
+        assert list(file.program()) == list(prog)
+
+def check_cache(prog: Program, dir: str):
+    cache = IRCache(dir)
+    text = dump(prog)
+    expected = load_program(text)
+
+    assert cache.program(text) == expected
+    assert cache.program(text) == expected
+
+    file = cache.open(text)
+    assert file is not None
+
+    with file:
+        assert list(file.functions()) == expected['functions']
+
+    assert cache.open(json.dumps(prog)) is None
+
+def check_damaged(prog: Program, dir: str):
+    cache = IRCache(dir)
+    text = dump(prog)
+    cache.store(text, prog)
+
+    with open(cache.path(text), 'rb') as f:
+        data = f.read()
+
+    for size in (0, 8):
+        with open(cache.path(text), 'wb') as f:
+            f.write(data[:size])
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+
+            assert cache.load(text) is None
+            gc.collect()
+
+        assert not any(
+            issubclass(warning.category, ResourceWarning)
+                for warning in caught
+        )
+
+def main():
+    prog: Program = json.load(sys.stdin)
+
+    try:
+        for check in (check_file, check_cache, check_damaged):
+            with tempfile.TemporaryDirectory() as dir:
+                check(prog, dir)
+    except AssertionError:
+        print('result: fail')
+        exit()
+
+    print('result: pass')
+
+if __name__ == '__main__':
+    main()
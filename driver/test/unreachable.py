@@ -0,0 +1,77 @@
+import json
+import sys
+from copy import deepcopy
+
+from bb import func_blocks
+from cfg import CFG
+from dom import dominators
+from licm import licm_func
+from nat import back_edges
+from ssa import ssa_func
+from syntax import Function, Program
+
+UNREACHABLE: Function = {
+    'name': 'unreachable',
+    'instrs': [
+        {'label': 'H'},
+        {'op': 'const', 'dest': 'one', 'type': 'int', 'value': 1},
+        {'op': 'const', 'dest': 'i', 'type': 'int', 'value': 5},
+        {'op': 'print', 'args': ['i']},
+        {'op': 'br', 'args': ['one'], 'labels': ['X', 'X']},
+        {'label': 'U'},
+        {'op': 'jmp', 'labels': ['H']},
+        {'label': 'X'},
+        {'op': 'ret'}
+    ]
+}
+
+def all_defined(func: Function) -> bool:
+    names = {arg['name'] for arg in func.get('args', [])}
+    names.add('__undef')
+
+    for item in func['instrs']:
+        if 'dest' in item:
+            names.add(item['dest'])
+
+    return all(
+        arg in names
+            for item in func['instrs'] for arg in item.get('args', [])
+    )
+
+def check_loops(func: Function):
+    graph = CFG.from_blocks(func_blocks(deepcopy(func)))
+    dom = dominators(graph)
+
+    for source, _ in back_edges(graph, dom):
+        assert dom.is_reachable(source)
+
+def check_passes(func: Function):
+    ssa = deepcopy(func)
+    ssa_func(ssa)
+    assert all_defined(ssa)
+
+    roundtrip = deepcopy(func)
+    ssa_func(roundtrip, roundtrip=True)
+    assert all_defined(roundtrip)
+
+    licm_func(roundtrip)
+    assert all_defined(roundtrip)
+
+def main():
+    prog: Program = json.load(sys.stdin)
+
+    for func in [UNREACHABLE, *prog['functions']]:
+        if not all_defined(func):
+            continue
+
+        try:
+            check_loops(func)
+            check_passes(func)
+        except AssertionError:
+            print('result: fail')
+            exit()
+
+    print('result: pass')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+../task03/utils.py
\ No newline at end of file
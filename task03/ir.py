@@ -0,0 +1,290 @@
+import json
+from array import array
+from typing import Any, Generic, Hashable, Iterator, Optional, TypeVar
+
+from bb import is_term
+from syntax import Argument, Function, Item, Program, Type
+
+K = TypeVar('K', bound=Hashable)
+
+class Interner(Generic[K]):
+    def __init__(self):
+        self.ids: dict[K, int] = {}
+        self.keys: list[K] = []
+
+    def intern(self, key: K) -> int:
+        if key not in self.ids:
+            self.ids[key] = len(self.keys)
+            self.keys.append(key)
+
+        return self.ids[key]
+
+    def __getitem__(self, i: int) -> K:
+        return self.keys[i]
+
+    def __contains__(self, key: K) -> bool:
+        return key in self.ids
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+OPCODES: Interner[str] = Interner()
+SHAPES: Interner[tuple[str, ...]] = Interner()
+
+LABEL = -1
+NONE = -1
+
+def type_key(type: Type) -> str:
+    return type if isinstance(type, str) else json.dumps(type)
+
+class CompactFunction:
+    def __init__(self, name: str):
+        self.name = name
+        self.keys: tuple[str, ...] = ('name', 'instrs')
+        self.attrs: dict[str, Any] = {}
+        self.params: Optional[list[Argument]] = None
+        self.type: Optional[Type] = None
+
+        self.vars: Interner[str] = Interner()
+        self.labels: Interner[str] = Interner()
+        self.funcs: Interner[str] = Interner()
+        self.types: Interner[str] = Interner()
+        self.type_values: list[Type] = []
+
+        self.ops = array('i')
+        self.dests = array('i')
+        self.type_ids = array('i')
+        self.shapes = array('i')
+
+        self.arg_offsets = array('i', [0])
+        self.arg_ids = array('i')
+        self.func_offsets = array('i', [0])
+        self.func_ids = array('i')
+        self.label_offsets = array('i', [0])
+        self.label_ids = array('i')
+
+        self.values: dict[int, Any] = {}
+        self.extras: dict[int, dict[str, Any]] = {}
+        self.block_starts = array('i', [0])
+
+    def __len__(self) -> int:
+        return len(self.ops)
+
+    def intern_type(self, type: Type) -> int:
+        key = type_key(type)
+
+        if key not in self.types:
+            self.type_values.append(type)
+
+        return self.types.intern(key)
+
+    def is_label(self, i: int) -> bool:
+        return self.ops[i] == LABEL
+
+    def label(self, i: int) -> str:
+        assert self.ops[i] == LABEL
+
+        return self.labels[self.dests[i]]
+
+    def op(self, i: int) -> Optional[str]:
+        return None if self.ops[i] == LABEL else OPCODES[self.ops[i]]
+
+    def dest(self, i: int) -> Optional[str]:
+        if self.ops[i] == LABEL or self.dests[i] == NONE:
+            return None
+
+        return self.vars[self.dests[i]]
+
+    def args(self, i: int) -> array:
+        return self.arg_ids[self.arg_offsets[i]:self.arg_offsets[i + 1]]
+
+    def arg_names(self, i: int) -> list[str]:
+        return [self.vars[arg] for arg in self.args(i)]
+
+    def blocks(self) -> Iterator[range]:
+        starts = self.block_starts
+
+        for i in range(len(starts) - 1):
+            yield range(starts[i], starts[i + 1])
+
+    def append(self, item: Item):
+        i = len(self.ops)
+        shape: list[str] = []
+        extra: dict[str, Any] = {}
+
+        op = dest = type = NONE
+
+        for key, value in item.items():
+            shape.append(key)
+
+            if key == 'label':
+                op = LABEL
+                dest = self.labels.intern(value)
+            elif key == 'op':
+                op = OPCODES.intern(value)
+            elif key == 'dest':
+                dest = self.vars.intern(value)
+            elif key == 'type':
+                type = self.intern_type(value)
+            elif key == 'args':
+                self.arg_ids.extend(self.vars.intern(arg) for arg in value)
+            elif key == 'funcs':
+                self.func_ids.extend(self.funcs.intern(f) for f in value)
+            elif key == 'labels':
+                self.label_ids.extend(
+                    self.labels.intern(label) for label in value
+                )
+            elif key == 'value':
+                self.values[i] = value
+            else:
+                extra[key] = value
+
+        self.ops.append(op)
+        self.dests.append(dest)
+        self.type_ids.append(type)
+        self.shapes.append(SHAPES.intern(tuple(shape)))
+
+        self.arg_offsets.append(len(self.arg_ids))
+        self.func_offsets.append(len(self.func_ids))
+        self.label_offsets.append(len(self.label_ids))
+
+        if extra:
+            self.extras[i] = extra
+
+    def item(self, i: int) -> Item:
+        item: dict[str, Any] = {}
+
+        for key in SHAPES[self.shapes[i]]:
+            if key == 'label':
+                item[key] = self.labels[self.dests[i]]
+            elif key == 'op':
+                item[key] = OPCODES[self.ops[i]]
+            elif key == 'dest':
+                item[key] = self.vars[self.dests[i]]
+            elif key == 'type':
+                item[key] = self.type_values[self.type_ids[i]]
+            elif key == 'args':
+                item[key] = self.arg_names(i)
+            elif key == 'funcs':
+                item[key] = [
+                    self.funcs[f] for f in self.func_ids[
+                        self.func_offsets[i]:self.func_offsets[i + 1]
+                    ]
+                ]
+            elif key == 'labels':
+                item[key] = [
+                    self.labels[label] for label in self.label_ids[
+                        self.label_offsets[i]:self.label_offsets[i + 1]
+                    ]
+                ]
+            elif key == 'value':
+                item[key] = self.values[i]
+            else:
+                item[key] = self.extras[i][key]
+
+        return item  # type: ignore
+
+    def items(self) -> list[Item]:
+        ops = OPCODES.keys
+        vars = self.vars.keys
+        labels = self.labels.keys
+        args = [vars[arg] for arg in self.arg_ids]
+        funcs = [self.funcs[f] for f in self.func_ids]
+        targets = [labels[label] for label in self.label_ids]
+        arg_offsets = self.arg_offsets.tolist()
+        func_offsets = self.func_offsets.tolist()
+        label_offsets = self.label_offsets.tolist()
+
+        items: list[Item] = []
+
+        for i, (op, dest, type, shape) in enumerate(zip(
+            self.ops.tolist(),
+            self.dests.tolist(),
+            self.type_ids.tolist(),
+            self.shapes.tolist()
+        )):
+            item: dict[str, Any] = {}
+
+            for key in SHAPES.keys[shape]:
+                if key == 'op':
+                    item[key] = ops[op]
+                elif key == 'dest':
+                    item[key] = vars[dest]
+                elif key == 'args':
+                    item[key] = args[arg_offsets[i]:arg_offsets[i + 1]]
+                elif key == 'type':
+                    item[key] = self.type_values[type]
+                elif key == 'label':
+                    item[key] = labels[dest]
+                elif key == 'value':
+                    item[key] = self.values[i]
+                elif key == 'labels':
+                    item[key] = targets[label_offsets[i]:label_offsets[i + 1]]
+                elif key == 'funcs':
+                    item[key] = funcs[func_offsets[i]:func_offsets[i + 1]]
+                else:
+                    item[key] = self.extras[i][key]
+
+            items.append(item)  # type: ignore
+
+        return items
+
+def find_blocks(func: CompactFunction) -> array:
+    terms = {
+        op for op in set(func.ops)
+            if op != LABEL and is_term({'op': OPCODES[op]})
+    }
+
+    starts = array('i', [0])
+    lead = 0
+
+    for i, op in enumerate(func.ops):
+        if op == LABEL:
+            if lead < i:
+                starts.append(i)
+
+            lead = i
+        elif op in terms:
+            starts.append(i + 1)
+            lead = i + 1
+
+    if lead < len(func):
+        starts.append(len(func))
+
+    return starts
+
+def from_func(func: Function) -> CompactFunction:
+    compact = CompactFunction(func['name'])
+    compact.keys = tuple(func)
+
+    for key, value in func.items():
+        if key == 'args':
+            compact.params = value  # type: ignore
+        elif key == 'type':
+            compact.type = value  # type: ignore
+        elif key not in ('name', 'instrs'):
+            compact.attrs[key] = value
+
+    for item in func['instrs']:
+        compact.append(item)
+
+    compact.block_starts = find_blocks(compact)
+
+    return compact
+
+def to_func(compact: CompactFunction) -> Function:
+    fields = {
+        **compact.attrs,
+        'name': compact.name,
+        'args': compact.params,
+        'type': compact.type,
+        'instrs': compact.items()
+    }
+
+    return {key: fields[key] for key in compact.keys}  # type: ignore
+
+def from_prog(prog: Program) -> list[CompactFunction]:
+    return [from_func(func) for func in prog['functions']]
+
+def to_prog(funcs: list[CompactFunction]) -> Program:
+    return {'functions': [to_func(func) for func in funcs]}
@@ -5,8 +5,9 @@ from dataclasses import dataclass
 from itertools import chain
 from typing import Any, NewType, Union
 
-from bb import BasicBlock, flatten_blocks, prog_blocks
-from syntax import Instruction, Literal, Program, Type
+from bb import BasicBlock, flatten_blocks, func_blocks
+from stats import count
+from syntax import Function, Instruction, Literal, Program, Type
 from tdce import tdce
 from utils import is_pure
 
@@ -78,6 +79,7 @@ def lvn(block: BasicBlock) -> BasicBlock:
     index: Index = {}
 
     result: BasicBlock = []
+    reused = 0
 
     for item in block:
         if 'label' in item:
@@ -114,6 +116,7 @@ def lvn(block: BasicBlock) -> BasicBlock:
                     table[context[dest]][1].remove(dest)
 
                 vars.add(dest)
+                reused += 1
             else:
                 result.append(rewrite_args(item, table, context))
 
@@ -129,8 +132,18 @@ def lvn(block: BasicBlock) -> BasicBlock:
         else:
             result.append(rewrite_args(item, table, context))
 
+    count('lvn.reused', reused)
+
     return result
 
+def lvn_func(func: Function):
+    blocks = func_blocks(func)
+
+    for i, block in enumerate(blocks):
+        blocks[i] = lvn(block)
+
+    func['instrs'] = flatten_blocks(tdce(blocks))
+
 def main():
     parser = argparse.ArgumentParser(description='Local value numbering.')
 
@@ -144,16 +157,8 @@ def main():
     args = parser.parse_args()
     prog: Program = json.load(args.file)
 
-    blocks = prog_blocks(prog)
-
     for func in prog['functions']:
-        name = func['name']
-        func_blocks = blocks[name]
-
-        for i, block in enumerate(func_blocks):
-            func_blocks[i] = lvn(block)
-
-        func['instrs'] = flatten_blocks(tdce(func_blocks))
+        lvn_func(func)
 
     json.dump(prog, sys.stdout)
 
@@ -0,0 +1,130 @@
+import tracemalloc
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from functools import wraps
+from time import perf_counter
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+Report = dict[str, dict[str, Any]]
+
+class Stats:
+    def __init__(self, memory: bool = False, tracing: bool = False):
+        self.memory = memory
+        self.tracing = tracing
+        self.timers: dict[str, dict[str, Any]] = {}
+        self.counters: dict[str, int] = {}
+        self.frames: list[list[int]] = []
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+
+            if self.frames:
+                self.frames[-1][1] = max(self.frames[-1][1], peak)
+
+            tracemalloc.reset_peak()
+            self.frames.append([current, current])
+
+        start = perf_counter()
+
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - start
+            timer = self.timers.setdefault(name, {'calls': 0, 'seconds': 0.0})
+            timer['calls'] += 1
+            timer['seconds'] += elapsed
+
+            if self.memory:
+                base, seen = self.frames.pop()
+                peak = max(seen, tracemalloc.get_traced_memory()[1])
+                timer['peak_bytes'] = max(
+                    timer.get('peak_bytes', 0),
+                    peak - base
+                )
+
+                if self.frames:
+                    self.frames[-1][1] = max(self.frames[-1][1], peak)
+
+    def report(self) -> Report:
+        return {'timers': self.timers, 'counters': self.counters}
+
+    def absorb(self, report: Report):
+        merge(self.report(), report)
+
+ACTIVE: Optional[Stats] = None
+
+def enable(memory: bool = False) -> Stats:
+    global ACTIVE
+
+    tracing = memory and not tracemalloc.is_tracing()
+
+    if tracing:
+        tracemalloc.start()
+
+    ACTIVE = Stats(memory, tracing)
+
+    return ACTIVE
+
+def disable() -> Optional[Stats]:
+    global ACTIVE
+
+    stats, ACTIVE = ACTIVE, None
+
+    if stats is not None and stats.tracing:
+        tracemalloc.stop()
+
+    return stats
+
+def active() -> Optional[Stats]:
+    return ACTIVE
+
+def count(name: str, n: int = 1):
+    if ACTIVE is not None:
+        ACTIVE.count(name, n)
+
+def timed(name: str) -> AbstractContextManager[None]:
+    if ACTIVE is None:
+        return nullcontext()
+
+    return ACTIVE.timer(name)
+
+def instrument(name: str) -> Callable[[F], F]:
+    def decorate(fn: F) -> F:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if ACTIVE is None:
+                return fn(*args, **kwargs)
+
+            with ACTIVE.timer(name):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore
+
+    return decorate
+
+def merge(report: Report, other: Report) -> Report:
+    for name, timer in other.get('timers', {}).items():
+        total = report.setdefault('timers', {}).setdefault(
+            name,
+            {'calls': 0, 'seconds': 0.0}
+        )
+        total['calls'] += timer['calls']
+        total['seconds'] += timer['seconds']
+
+        if 'peak_bytes' in timer:
+            total['peak_bytes'] = max(
+                total.get('peak_bytes', 0),
+                timer['peak_bytes']
+            )
+
+    for name, n in other.get('counters', {}).items():
+        counters = report.setdefault('counters', {})
+        counters[name] = counters.get(name, 0) + n
+
+    return report
@@ -0,0 +1,28 @@
+from typing import Iterable
+
+from ir import Interner
+from syntax import Item
+
+class Symbols(Interner[str]):
+    def intern_all(self, names: Iterable[str]) -> list[int]:
+        return [self.intern(name) for name in names]
+
+    def names(self, ids: Iterable[int]) -> list[str]:
+        return [self.keys[i] for i in ids]
+
+def symbols(
+    blocks: Iterable[Iterable[Item]],
+    params: Iterable[str] = ()
+) -> Symbols:
+    table = Symbols()
+    table.intern_all(params)
+
+    for block in blocks:
+        for item in block:
+            if 'dest' in item:
+                table.intern(item['dest'])
+
+            if 'args' in item:
+                table.intern_all(item['args'])
+
+    return table
@@ -2,8 +2,9 @@ import argparse
 import json
 import sys
 
-from bb import BasicBlock, flatten_blocks, prog_blocks
-from syntax import Item, Program
+from bb import BasicBlock, flatten_blocks, func_blocks
+from stats import count
+from syntax import Function, Item, Program
 from utils import is_pure
 
 def globally_used(blocks: list[BasicBlock]) -> set[str]:
@@ -53,8 +54,16 @@ def tdce(blocks: list[BasicBlock]) -> list[BasicBlock]:
 
             current[i] = new
 
+    count(
+        'tdce.removed',
+        sum(map(len, blocks)) - sum(map(len, current))
+    )
+
     return current
 
+def tdce_func(func: Function):
+    func['instrs'] = flatten_blocks(tdce(func_blocks(func)))
+
 def main():
     parser = argparse.ArgumentParser(
         description='Trivial dead code elimination.'
@@ -70,13 +79,8 @@ def main():
     args = parser.parse_args()
     prog: Program = json.load(args.file)
 
-    blocks = prog_blocks(prog)
-
     for func in prog['functions']:
-        name = func['name']
-        func_blocks = blocks[name]
-
-        func['instrs'] = flatten_blocks(tdce(func_blocks))
+        tdce_func(func)
 
     json.dump(prog, sys.stdout)
 
@@ -0,0 +1,67 @@
+from dataclasses import dataclass
+from typing import Callable, Generic, Hashable, Iterable, TypeVar
+
+from dfa import DFA, V, Value
+
+T = TypeVar('T', bound=Hashable)
+
+class Universe(Generic[T]):
+    def __init__(self):
+        self.items: list[T] = []
+        self.index: dict[T, int] = {}
+
+    def bit(self, item: T) -> int:
+        if item not in self.index:
+            self.index[item] = len(self.items)
+            self.items.append(item)
+
+        return 1 << self.index[item]
+
+    def mask(self, items: Iterable[T]) -> int:
+        bits = 0
+
+        for item in items:
+            bits |= self.bit(item)
+
+        return bits
+
+    def decode(self, bits: int) -> set[T]:
+        items: set[T] = set()
+
+        while bits:
+            low = bits & -bits
+            items.add(self.items[low.bit_length() - 1])
+            bits ^= low
+
+        return items
+
+def identity(size: int) -> Universe[int]:
+    universe: Universe[int] = Universe()
+    universe.mask(range(size))
+
+    return universe
+
+@dataclass(eq=False)
+class BitSet(Value):
+    bits: int
+
+    @classmethod
+    def top(cls):
+        return cls(0)
+
+    def meet(self: 'BitSet', other: 'BitSet'):
+        self.bits |= other.bits
+
+    def __eq__(self: 'BitSet', other: 'BitSet') -> bool:
+        return self.bits == other.bits
+
+@dataclass
+class DenseDFA(DFA[BitSet], Generic[T]):
+    universe: Universe[T]
+
+    def decode(self, wrap: Callable[[set[T]], V]) -> DFA[V]:
+        return DFA(
+            [wrap(self.universe.decode(value.bits)) for value in self.ins],
+            [wrap(self.universe.decode(value.bits)) for value in self.outs],
+            self.visits
+        )
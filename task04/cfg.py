@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field, InitVar
+from typing import Optional
 
 from bb import BasicBlock
 
@@ -8,6 +9,8 @@ class Node:
     block: BasicBlock
     ins: list['Node']
     outs: list['Node']
+    prev: Optional['Node'] = field(default=None, repr=False)
+    next: Optional['Node'] = field(default=None, repr=False)
 
 def successors(i: int, nodes: list[Node], labels: dict[str, Node]):
     last = nodes[i].block[-1]
@@ -31,11 +34,35 @@ def is_exit(i: int, nodes: list[Node]):
 
     return i + 1 == len(nodes)
 
+def get_label(node: Node) -> str:
+    assert 'label' in node.block[0]
+
+    return node.block[0]['label']
+
+def falls_through(node: Node) -> bool:
+    last = node.block[-1]
+
+    return 'labels' not in last and ('op' not in last or last['op'] != 'ret')
+
+def replace(nodes: list[Node], old: Node, new: Node):
+    for i, node in enumerate(nodes):
+        if node is old:
+            nodes[i] = new
+
 @dataclass
 class CFG:
     entry: Node
     exits: list[Node]
     all: list[Node]
+    order: InitVar[list[Node]]
+
+    def __post_init__(self, order: list[Node]):
+        self.first: Optional[Node] = None
+        last: Optional[Node] = None
+
+        for node in order:
+            self.link(node, last)
+            last = node
 
     @classmethod
     def from_blocks(cls, blocks: list[BasicBlock]):
@@ -56,4 +83,141 @@ class CFG:
             if is_exit(i, nodes):
                 exits.append(node)
 
-        return cls(nodes[0], exits, nodes)
+        return cls(nodes[0], exits, nodes, nodes.copy())
+
+    @property
+    def layout(self) -> list[Node]:
+        nodes: list[Node] = []
+        node = self.first
+
+        while node is not None:
+            nodes.append(node)
+            node = node.next
+
+        return nodes
+
+    def following(self, node: Node) -> Optional[Node]:
+        return node.next
+
+    def link(self, node: Node, after: Optional[Node]):
+        node.prev = after
+        node.next = self.first if after is None else after.next
+
+        if node.next is not None:
+            node.next.prev = node
+
+        if after is None:
+            self.first = node
+        else:
+            after.next = node
+
+    def unlink(self, node: Node):
+        if node.prev is None:
+            self.first = node.next
+        else:
+            node.prev.next = node.next
+
+        if node.next is not None:
+            node.next.prev = node.prev
+
+        node.prev = node.next = None
+
+    def add_block(self, block: BasicBlock, after: Optional[Node]) -> Node:
+        node = Node(len(self.all), block, [], [])
+
+        self.all.append(node)
+        self.link(node, after)
+
+        return node
+
+    def retarget(self, source: Node, old: Node, new: Node):
+        last = source.block[-1]
+
+        if 'labels' in last:
+            last['labels'] = [
+                get_label(new) if label == get_label(old) else label
+                    for label in last['labels']
+            ]
+        elif self.following(source) is not new:
+            source.block.append({'op': 'jmp', 'labels': [get_label(new)]})
+
+    def redirect_edge(self, source: Node, old: Node, new: Node):
+        count = source.outs.count(old)
+
+        self.retarget(source, old, new)
+
+        replace(source.outs, old, new)
+        old.ins = [node for node in old.ins if node is not source]
+        new.ins.extend(source for _ in range(count))
+
+    def insert_block(
+        self,
+        block: BasicBlock,
+        target: Node,
+        sources: list[Node]
+    ) -> Node:
+        before = target.prev
+        unique = dict.fromkeys(sources)
+
+        node = self.add_block(block, before)
+        node.outs = [target]
+
+        for source in unique:
+            node.ins.extend(source for _ in range(source.outs.count(target)))
+
+            self.retarget(source, target, node)
+            replace(source.outs, target, node)
+
+        if (before is not None and before not in unique
+                and falls_through(before)):
+            before.block.append({'op': 'jmp', 'labels': [get_label(target)]})
+
+        target.ins = [node] + [
+            other for other in target.ins if other not in unique
+        ]
+
+        if target is self.entry:
+            self.entry = node
+
+        return node
+
+    def split_edge(self, source: Node, target: Node, block: BasicBlock) -> Node:
+        node = self.add_block(block, source)
+        node.ins = [source for _ in range(source.outs.count(target))]
+        node.outs = [target]
+
+        self.retarget(source, target, node)
+        replace(source.outs, target, node)
+
+        i = target.ins.index(source)
+        target.ins = [other for other in target.ins if other is not source]
+        target.ins.insert(i, node)
+
+        if self.following(node) is not target:
+            block.append({'op': 'jmp', 'labels': [get_label(target)]})
+
+        return node
+
+    def remove_block(self, node: Node):
+        assert not node.ins or len(node.outs) == 1
+        assert node is not self.entry or self.following(node) in node.outs
+
+        self.unlink(node)
+
+        if node in self.exits:
+            self.exits.remove(node)
+
+        for successor in node.outs:
+            successor.ins = [
+                other for other in successor.ins if other is not node
+            ]
+
+        for predecessor in node.ins:
+            self.redirect_edge(predecessor, node, node.outs[0])
+
+        if node is self.entry:
+            self.entry = node.outs[0]
+
+        node.block = []
+        node.ins = []
+        node.outs = []
@@ -0,0 +1,110 @@
+from array import array
+from dataclasses import dataclass
+from functools import cached_property
+from itertools import accumulate, chain
+from typing import Iterable, Sequence, Union
+
+from cfg import CFG, Node
+
+def post_order(
+    successors: Sequence[Sequence[int]],
+    roots: Iterable[int]
+) -> list[int]:
+    visited = bytearray(len(successors))
+    post: list[int] = []
+
+    for root in roots:
+        if visited[root]:
+            continue
+
+        visited[root] = 1
+        stack = [(root, iter(successors[root]))]
+
+        while stack:
+            node, edges = stack[-1]
+
+            for successor in edges:
+                if not visited[successor]:
+                    visited[successor] = 1
+                    stack.append((successor, iter(successors[successor])))
+
+                    break
+            else:
+                post.append(node)
+                stack.pop()
+
+    return post
+
+def pack(lists: list[list[int]]) -> tuple[array, array]:
+    offsets = array('i', [0])
+    offsets.extend(accumulate(map(len, lists)))
+
+    return offsets, array('i', chain.from_iterable(lists))
+
+def unpack(offsets: array, targets: array) -> list[list[int]]:
+    flat = targets.tolist()
+    bounds = offsets.tolist()
+
+    return list(map(flat.__getitem__, map(slice, bounds, bounds[1:])))
+
+@dataclass(frozen=True)
+class Snapshot:
+    all: list[Node]
+    entry: Node
+    exits: list[Node]
+    succ_offsets: array
+    succs: array
+    pred_offsets: array
+    preds: array
+    rpo: array
+    rpo_index: array
+
+    @classmethod
+    def from_cfg(cls, graph: CFG) -> 'Snapshot':
+        successors = [[node.id for node in node.outs] for node in graph.all]
+        predecessors = [[node.id for node in node.ins] for node in graph.all]
+
+        post = post_order(successors, (graph.entry.id,))
+        post.reverse()
+
+        rpo_index = array('i', [-1]) * len(graph.all)
+
+        for i, node in enumerate(post):
+            rpo_index[node] = i
+
+        snap = cls(
+            graph.all.copy(),
+            graph.entry,
+            graph.exits.copy(),
+            *pack(successors),
+            *pack(predecessors),
+            array('i', post),
+            rpo_index
+        )
+
+        snap.__dict__['successor_lists'] = successors
+        snap.__dict__['predecessor_lists'] = predecessors
+
+        return snap
+
+    @cached_property
+    def successor_lists(self) -> list[list[int]]:
+        return unpack(self.succ_offsets, self.succs)
+
+    @cached_property
+    def predecessor_lists(self) -> list[list[int]]:
+        return unpack(self.pred_offsets, self.preds)
+
+    def successors(self, i: int) -> array:
+        return self.succs[self.succ_offsets[i]:self.succ_offsets[i + 1]]
+
+    def predecessors(self, i: int) -> array:
+        return self.preds[self.pred_offsets[i]:self.pred_offsets[i + 1]]
+
+Graph = Union[CFG, Snapshot]
+
+def snapshot(graph: Graph) -> Snapshot:
+    if isinstance(graph, Snapshot):
+        return graph
+
+    return Snapshot.from_cfg(graph)
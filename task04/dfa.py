@@ -1,10 +1,13 @@
 from abc import ABC, abstractmethod
-from collections import OrderedDict
 from dataclasses import dataclass
 from enum import Enum
-from typing import Callable, Generic, TypeVar
+from heapq import heapify, heappop, heappush
+from typing import Callable, Generic, Optional, TypeVar
 
+from bb import BasicBlock
 from cfg import CFG, Node
+from csr import Graph, post_order, snapshot
+from stats import count, instrument
 
 class Direction(Enum):
     FORWARD = 0
@@ -32,51 +35,142 @@ class Framework(Generic[V]):
     value: type[V]
     transfer: Callable[[Node, V], V]
     init: V
+    step: Optional[Callable[[Node, int, V], V]] = None
 
 @dataclass
 class DFA(Generic[V]):
     ins: list[V]
     outs: list[V]
+    visits: int
 
-class WorkList(OrderedDict):
-    def __setitem__(self, key, value):
-        super().__setitem__(key, value)
-        self.move_to_end(key)
+def priority_order(graph: Graph, dir: Direction) -> list[int]:
+    snap = snapshot(graph)
 
-def dfa(graph: CFG, framework: Framework[V]) -> DFA[V]:
-    ins = [framework.init for _ in graph.all]
-    outs = [framework.init for _ in graph.all]
+    if dir == Direction.FORWARD:
+        order = snap.rpo.tolist()
+    else:
+        roots = [node.id for node in snap.exits]
+        order = post_order(snap.predecessor_lists, roots)
+        order.reverse()
+
+    visited = set(order)
+    order.extend(node.id for node in snap.all if node.id not in visited)
+
+    return order
+
+@instrument('analysis.dfa')
+def dfa(graph: Graph, framework: Framework[V]) -> DFA[V]:
+    snap = snapshot(graph)
+
+    ins = [framework.init for _ in snap.all]
+    outs = [framework.init for _ in snap.all]
 
     if framework.dir == Direction.FORWARD:
         transfer_in = ins
         transfer_out = outs
+        predecessors = snap.predecessor_lists
+        successors = snap.successor_lists
     else:
         transfer_in = outs
         transfer_out = ins
+        predecessors = snap.successor_lists
+        successors = snap.predecessor_lists
+
+    order = priority_order(snap, framework.dir)
+    rank = [0 for _ in snap.all]
 
-    work_list = WorkList.fromkeys(graph.all)
+    for i, node in enumerate(order):
+        rank[node] = i
+
+    work_list = list(range(len(order)))
+    next_pass: list[int] = []
+    queued = [True for _ in snap.all]
+    visits = 0
 
     while work_list:
-        node, _ = work_list.popitem(False)
+        current = heappop(work_list)
+        node = order[current]
+        queued[node] = False
+        visits += 1
+
+        value = framework.value.top()
+
+        for predecessor in predecessors[node]:
+            value.meet(transfer_out[predecessor])
+
+        transfer_in[node] = value
+        new = framework.transfer(snap.all[node], value)
+
+        if new != transfer_out[node]:
+            transfer_out[node] = new
+
+            for successor in successors[node]:
+                if not queued[successor]:
+                    queued[successor] = True
+
+                    if rank[successor] > current:
+                        heappush(work_list, rank[successor])
+                    else:
+                        next_pass.append(rank[successor])
+
+        if not work_list:
+            work_list, next_pass = next_pass, work_list
+            heapify(work_list)
+
+    count('dfa.visits', visits)
+
+    return DFA(ins, outs, visits)
+
+class Points(Generic[V]):
+    def __init__(
+        self,
+        graph: Graph,
+        analysis: Callable[[Graph], Framework[V]]
+    ):
+        self.graph = graph
+        self.analysis = analysis
+        self.solve()
+
+    def solve(self):
+        self.framework = self.analysis(self.graph)
+        self.result = dfa(self.graph, self.framework)
+        self.cache: dict[int, tuple[BasicBlock, int, list[V]]] = {}
+
+    def invalidate(self, node: Optional[Node] = None):
+        if node is None:
+            self.solve()
+        else:
+            self.cache.pop(node.id, None)
+
+    def values(self, node: Node) -> list[V]:
+        if node.id in self.cache:
+            block, size, values = self.cache[node.id]
+
+            if block is node.block and size == len(node.block):
+                return values
+
+        step = self.framework.step
+        assert step is not None
+
+        if self.framework.dir == Direction.FORWARD:
+            values = [self.result.ins[node.id]]
 
-        if framework.dir == Direction.FORWARD:
-            predecessors = node.ins
-            successors = node.outs
+            for i in range(len(node.block)):
+                values.append(step(node, i, values[-1]))
         else:
-            predecessors = node.outs
-            successors = node.ins
+            values = [self.result.outs[node.id]]
 
-        transfer_in[node.id] = framework.value.top()
+            for i in reversed(range(len(node.block))):
+                values.append(step(node, i, values[-1]))
 
-        for predecessor in predecessors:
-            transfer_in[node.id].meet(transfer_out[predecessor.id])
+            values.reverse()
 
-        new = framework.transfer(node, transfer_in[node.id])
+        self.cache[node.id] = (node.block, len(node.block), values)
 
-        if new != transfer_out[node.id]:
-            transfer_out[node.id] = new
+        return values
 
-            for successor in successors:
-                work_list[successor] = None
+    def before(self, node: Node, idx: int) -> V:
+        return self.values(node)[idx]
 
-    return DFA(ins, outs)
+    def after(self, node: Node, idx: int) -> V:
+        return self.values(node)[idx + 1]
@@ -0,0 +1 @@
+../task03/ir.py
\ No newline at end of file
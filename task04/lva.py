@@ -1,11 +1,14 @@
 from dataclasses import dataclass
 
-from cfg import CFG, Node
-from dfa import dfa, DFA, Direction, Framework, Value
+from bits import BitSet, DenseDFA, identity
+from cfg import Node
+from csr import Graph
+from dfa import dfa, DFA, Direction, Framework, Points, Value
+from symbols import Symbols
 
 @dataclass(eq=False)
 class LiveVars(Value):
-    vars: set[str]
+    vars: set[int]
 
     @classmethod
     def top(cls):
@@ -17,26 +20,30 @@ class LiveVars(Value):
     def __eq__(self: 'LiveVars', other: 'LiveVars') -> bool:
         return self.vars == other.vars
 
-    def __str__(self) -> str:
-        return ', '.join(sorted(self.vars))
+    def format(self, symbols: Symbols) -> str:
+        return ', '.join(sorted(symbols.names(self.vars)))
 
 @dataclass(init=False)
 class Transfer:
-    gen: list[set[str]]
-    kill: list[set[str]]
+    symbols: Symbols
+    gen: list[set[int]]
+    kill: list[set[int]]
 
-    def __init__(self, graph: CFG) -> None:
+    def __init__(self, graph: Graph, symbols: Symbols) -> None:
+        self.symbols = symbols
         self.gen = [set() for _ in graph.all]
         self.kill = [set() for _ in graph.all]
 
         for i, node in enumerate(graph.all):
             for item in reversed(node.block):
                 if 'dest' in item:
-                    self.gen[i].discard(item['dest'])
-                    self.kill[i].add(item['dest'])
+                    dest = symbols.intern(item['dest'])
+
+                    self.gen[i].discard(dest)
+                    self.kill[i].add(dest)
 
                 if 'args' in item:
-                    self.gen[i].update(item['args'])
+                    self.gen[i].update(symbols.intern_all(item['args']))
 
     def __call__(self, node: Node, arg: LiveVars) -> LiveVars:
         vars = arg.vars.difference(self.kill[node.id])
@@ -44,12 +51,73 @@ class Transfer:
 
         return LiveVars(vars)
 
-def lva(graph: CFG) -> DFA[LiveVars]:
-    framework = Framework(
+    def step(self, node: Node, idx: int, arg: LiveVars) -> LiveVars:
+        item = node.block[idx]
+        vars = arg.vars.copy()
+
+        if 'dest' in item:
+            vars.discard(self.symbols.intern(item['dest']))
+
+        if 'args' in item:
+            vars.update(self.symbols.intern_all(item['args']))
+
+        return LiveVars(vars)
+
+def lva_framework(graph: Graph, symbols: Symbols) -> Framework[LiveVars]:
+    transfer = Transfer(graph, symbols)
+
+    return Framework(
         Direction.BACKWARD,
         LiveVars,
-        Transfer(graph),
-        LiveVars(set())
+        transfer,
+        LiveVars(set()),
+        transfer.step
     )
 
-    return dfa(graph, framework)
+def lva(graph: Graph, symbols: Symbols) -> DFA[LiveVars]:
+    return dfa(graph, lva_framework(graph, symbols))
+
+def lva_points(graph: Graph, symbols: Symbols) -> Points[LiveVars]:
+    return Points(graph, lambda graph: lva_framework(graph, symbols))
+
+@dataclass(init=False)
+class DenseTransfer:
+    gen: list[int]
+    kill: list[int]
+
+    def __init__(self, graph: Graph, symbols: Symbols) -> None:
+        self.gen = [0 for _ in graph.all]
+        self.kill = [0 for _ in graph.all]
+
+        for i, node in enumerate(graph.all):
+            for item in reversed(node.block):
+                if 'dest' in item:
+                    bit = 1 << symbols.intern(item['dest'])
+
+                    self.gen[i] &= ~bit
+                    self.kill[i] |= bit
+
+                if 'args' in item:
+                    for arg in item['args']:
+                        self.gen[i] |= 1 << symbols.intern(arg)
+
+    def __call__(self, node: Node, arg: BitSet) -> BitSet:
+        return BitSet(arg.bits & ~self.kill[node.id] | self.gen[node.id])
+
+def lva_dense(graph: Graph, symbols: Symbols) -> DenseDFA[int]:
+    transfer = DenseTransfer(graph, symbols)
+    framework = Framework(
+        Direction.BACKWARD,
+        BitSet,
+        transfer,
+        BitSet(0)
+    )
+
+    result = dfa(graph, framework)
+
+    return DenseDFA(
+        result.ins,
+        result.outs,
+        result.visits,
+        identity(len(symbols))
+    )
@@ -5,11 +5,25 @@ from typing import Any, Callable
 
 from bb import prog_blocks
 from dfa import CFG, DFA
-from lva import lva
-from rda import rda
+from lva import LiveVars, lva, lva_dense
+from rda import rda, rda_dense, ReachingDefs
+from symbols import Symbols, symbols
 from syntax import Program
 
-def get_analysis(name: str) -> Callable[[CFG], DFA[Any]]:
+def get_analysis(
+    name: str,
+    dense: bool
+) -> Callable[[CFG, Symbols], DFA[Any]]:
+    if dense:
+        return {
+            'lva': lambda graph, table: (
+                lva_dense(graph, table).decode(LiveVars)
+            ),
+            'rda': lambda graph, table: (
+                rda_dense(graph, table).decode(ReachingDefs)
+            )
+        }[name]
+
     return {
         'lva': lva,
         'rda': rda
@@ -29,11 +43,19 @@ def main():
         choices=('lva', 'rda'),
         default='lva'
     )
+    parser.add_argument(
+        '--dense',
+        action='store_true'
+    )
+    parser.add_argument(
+        '--visits',
+        action='store_true'
+    )
 
     args = parser.parse_args()
 
     prog: Program = json.load(args.file)
-    analysis = get_analysis(args.analysis)
+    analysis = get_analysis(args.analysis, args.dense)
 
     blocks = prog_blocks(prog)
     anon = 0
@@ -42,7 +64,8 @@ def main():
         name = func['name']
         func_blocks = blocks[name]
 
-        dfa = analysis(CFG.from_blocks(func_blocks))
+        table = symbols(func_blocks)
+        dfa = analysis(CFG.from_blocks(func_blocks), table)
 
         for ins, outs, block in zip(dfa.ins, dfa.outs, func_blocks):
             if 'label' in block[0]:
@@ -52,8 +75,11 @@ def main():
                 anon += 1
 
             print(f'@{name}.{label}:')
-            print(f'  ins: {ins}')
-            print(f'  outs: {outs}')
+            print(f'  ins: {ins.format(table)}')
+            print(f'  outs: {outs.format(table)}')
+
+        if args.visits:
+            print(f'@{name}: {dfa.visits} visits', file=sys.stderr)
 
 if __name__ == '__main__':
     main()
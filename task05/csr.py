@@ -0,0 +1 @@
+../task04/csr.py
\ No newline at end of file
@@ -1,87 +1,228 @@
 from dataclasses import dataclass
-from typing import Generator, Optional
+from itertools import islice
+from typing import Generator, Iterable, Optional, Sequence
 
 from cfg import CFG, Node
+from csr import Graph, snapshot
+from stats import instrument
 
 def post_order(graph: CFG) -> Generator[Node, None, None]:
-    visited: set[int] = set()
+    visited = {graph.entry.id}
+    stack = [(graph.entry, iter(graph.entry.outs))]
 
-    def visit(node: Node) -> Generator[Node, None, None]:
-        visited.add(node.id)
+    while stack:
+        node, successors = stack[-1]
 
-        for successor in node.outs:
+        for successor in successors:
             if successor.id not in visited:
-                yield from visit(successor)
+                visited.add(successor.id)
+                stack.append((successor, iter(successor.outs)))
 
-        yield node
+                break
+        else:
+            stack.pop()
 
-    return visit(graph.entry)
+            yield node
 
-def dominators(graph: CFG) -> list[set[Node]]:
-    dom = [set(graph.all) for _ in graph.all]
-    dom[graph.entry.id] = {graph.entry}
+def immediate_dominators(graph: Graph) -> list[Optional[Node]]:
+    snap = snapshot(graph)
+    rank = snap.rpo_index.tolist()
+    predecessors = snap.predecessor_lists
 
-    post = list(post_order(graph))
-    changed = True
+    entry = snap.entry.id
+    idom = [-1 for _ in snap.all]
+    idom[entry] = entry
 
-    while changed:
-        changed = False
+    def intersect(a: int, b: int) -> int:
+        while a != b:
+            while rank[a] > rank[b]:
+                a = idom[a]
 
-        for node in reversed(post):
-            if node.id != graph.entry.id:
-                new = set(graph.all)
+            while rank[b] > rank[a]:
+                b = idom[b]
 
-                for predecessor in node.ins:
-                    new.intersection_update(dom[predecessor.id])
+        return a
 
-                new.add(node)
+    changed = True
 
-                if new != dom[node.id]:
-                    dom[node.id] = new
-                    changed = True
+    while changed:
+        changed = False
 
-    return dom
+        for node in islice(snap.rpo, 1, None):
+            new = -1
 
-def dominates(graph: CFG, dom: list[set[Node]]) -> list[set[Node]]:
-    dominates: list[set[Node]] = [set() for _ in graph.all]
+            for predecessor in predecessors[node]:
+                if idom[predecessor] >= 0:
+                    if new < 0:
+                        new = predecessor
+                    else:
+                        new = intersect(predecessor, new)
 
-    for dominated, dominators in zip(graph.all, dom):
-        for dominator in dominators:
-            dominates[dominator.id].add(dominated)
+            if new != idom[node]:
+                idom[node] = new
+                changed = True
 
-    return dominates
+    idom[entry] = -1
+
+    return [snap.all[i] if i >= 0 else None for i in idom]
 
 @dataclass
 class DomTree:
     node: Node
     parent: Optional['DomTree']
     children: list['DomTree']
+    pre: int = -1
+    post: int = -1
+
+def number_tree(root: DomTree):
+    root.pre = 0
+
+    stack = [(root, iter(root.children))]
+    pre, post = 1, 0
 
-def dom_tree(graph: CFG, dom: list[set[Node]]) -> list[DomTree]:
+    while stack:
+        tree, children = stack[-1]
+
+        if (child := next(children, None)) is not None:
+            child.pre = pre
+            pre += 1
+
+            stack.append((child, iter(child.children)))
+        else:
+            tree.post = post
+            post += 1
+
+            stack.pop()
+
+def idom_tree(graph: Graph, idom: list[Optional[Node]]) -> list[DomTree]:
     all = [DomTree(node, None, []) for node in graph.all]
 
-    for i, node in enumerate(all):
-        for dominator in dom[i]:
-            if dominator.id == i:
-                continue
+    for tree, dominator in zip(all, idom):
+        if dominator is not None:
+            tree.parent = all[dominator.id]
+            tree.parent.children.append(tree)
 
-            for other in dom[i]:
-                if dominator in dom[other.id] and dominator.id != other.id != i:
-                    break
-            else:
-                node.parent = all[dominator.id]
-                all[dominator.id].children.append(node)
+    number_tree(all[graph.entry.id])
 
     return all
 
-def dom_frontier(graph: CFG, dom: list[set[Node]]):
-    doms = dominates(graph, dom)
+class Dominators(Sequence[set[Node]]):
+    def __init__(self, graph: Graph, idom: list[Optional[Node]]):
+        self.graph = graph
+        self.idom = idom
+        self.tree = idom_tree(graph, idom)
+        self.sets: dict[int, set[Node]] = {}
+        self.jumps: list[list[Optional[Node]]] = []
+
+    def is_reachable(self, node: Node) -> bool:
+        return self.tree[node.id].pre >= 0
+
+    def dominates(self, a: Node, b: Node) -> bool:
+        x = self.tree[a.id]
+        y = self.tree[b.id]
+
+        if y.pre < 0:
+            return True
+
+        return 0 <= x.pre <= y.pre and y.post <= x.post
+
+    def strictly_dominates(self, a: Node, b: Node) -> bool:
+        return a.id != b.id and self.dominates(a, b)
+
+    def ancestors(self) -> list[list[Optional[Node]]]:
+        if not self.jumps:
+            level = self.idom
+
+            while any(node is not None for node in level):
+                self.jumps.append(level)
+                level = [
+                    None if node is None else level[node.id]
+                        for node in level
+                ]
+
+        return self.jumps
+
+    def nearest_common_dominator(self, a: Node, b: Node) -> Optional[Node]:
+        if self.dominates(a, b):
+            return a
+
+        for level in reversed(self.ancestors()):
+            ancestor = level[a.id]
+
+            if ancestor is not None and not self.dominates(ancestor, b):
+                a = ancestor
+
+        return self.idom[a.id]
+
+    def __len__(self) -> int:
+        return len(self.idom)
+
+    def __getitem__(self, i: int) -> set[Node]:
+        if i not in self.sets:
+            node: Optional[Node] = self.graph.all[i]
+
+            if self.is_reachable(self.graph.all[i]):
+                dom: set[Node] = set()
+
+                while node is not None:
+                    dom.add(node)
+                    node = self.idom[node.id]
+            else:
+                dom = set(self.graph.all)
+
+            self.sets[i] = dom
+
+        return self.sets[i]
+
+@instrument('analysis.dom')
+def dominators(graph: Graph) -> Dominators:
+    return Dominators(graph, immediate_dominators(graph))
+
+def dominates(graph: Graph, dom: Dominators) -> list[set[Node]]:
+    dominates: list[set[Node]] = [set() for _ in graph.all]
+
+    for dominated, dominators in zip(graph.all, dom):
+        for dominator in dominators:
+            dominates[dominator.id].add(dominated)
+
+    return dominates
+
+def dom_tree(graph: Graph, dom: Dominators) -> list[DomTree]:
+    return dom.tree
+
+@instrument('analysis.frontier')
+def dom_frontier(graph: Graph, dom: Dominators) -> list[set[Node]]:
     frontier: list[set[Node]] = [set() for _ in graph.all]
 
     for node in graph.all:
-        for dominated in doms[node.id]:
-            for successor in dominated.outs:
-                if node not in dom[successor.id] or node.id == successor.id:
-                    frontier[node.id].add(successor)
+        for predecessor in node.ins:
+            if dom.is_reachable(predecessor):
+                runner: Optional[Node] = predecessor
+
+                while runner is not None and runner is not dom.idom[node.id]:
+                    frontier[runner.id].add(node)
+                    runner = dom.idom[runner.id]
+            else:
+                for other in graph.all:
+                    if not dom.strictly_dominates(other, node):
+                        frontier[other.id].add(node)
 
     return frontier
+
+def iterated_frontier(
+    frontier: list[set[Node]],
+    nodes: Iterable[Node]
+) -> set[Node]:
+    work = list(nodes)
+    seen = set(work)
+    result: set[Node] = set()
+
+    while work:
+        for node in frontier[work.pop().id]:
+            result.add(node)
+
+            if node not in seen:
+                seen.add(node)
+                work.append(node)
+
+    return result
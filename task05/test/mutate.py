@@ -0,0 +1,144 @@
+import json
+import sys
+from collections import Counter
+from copy import deepcopy
+from itertools import count
+from typing import Iterator
+
+from bb import BasicBlock, prog_blocks
+from cfg import CFG, get_label, Node
+from syntax import Program
+
+def label_blocks(blocks: list[BasicBlock]):
+    for i, block in enumerate(blocks):
+        if not block or 'label' not in block[0]:
+            block.insert(0, {'label': f'__b{i}'})
+
+def edges(graph: CFG) -> dict[str, list[str]]:
+    return {
+        get_label(node): [get_label(successor) for successor in node.outs]
+            for node in graph.layout
+    }
+
+def check_links(graph: CFG):
+    layout = graph.layout
+    prev = None
+
+    assert len(set(layout)) == len(layout)
+    assert graph.entry is layout[0]
+
+    for node in layout:
+        assert node.prev is prev
+        prev = node
+
+    for node in graph.all:
+        if node not in layout:
+            assert not node.ins and not node.outs
+
+def check_consistent(graph: CFG):
+    check_links(graph)
+
+    rebuilt = CFG.from_blocks([list(node.block) for node in graph.layout])
+    assert edges(rebuilt) == edges(graph)
+
+    preds: Counter[tuple[int, int]] = Counter()
+
+    for node in graph.layout:
+        for successor in node.outs:
+            preds[(successor.id, node.id)] += 1
+
+    actual: Counter[tuple[int, int]] = Counter()
+
+    for node in graph.layout:
+        for predecessor in node.ins:
+            actual[(node.id, predecessor.id)] += 1
+
+    assert preds == actual
+
+    for node in graph.layout:
+        last = node.block[-1]
+
+        if 'labels' in last:
+            assert last['labels'] == [
+                get_label(successor) for successor in node.outs
+            ]
+
+def new_blocks() -> Iterator[BasicBlock]:
+    for i in count(1):
+        yield [{'label': f'__new{i}'}]
+
+def mutate(graph: CFG, fresh: Iterator[BasicBlock]) -> list[Node]:
+    added: list[Node] = []
+
+    for node in list(graph.layout):
+        if len(node.ins) > 1:
+            sources = list(dict.fromkeys(node.ins))
+            added.append(graph.insert_block(next(fresh), node, sources[:1]))
+            check_consistent(graph)
+
+            added.append(graph.insert_block(next(fresh), node, sources[1:]))
+            check_consistent(graph)
+
+    for node in list(graph.layout):
+        if len(node.outs) > 1:
+            for target in list(dict.fromkeys(node.outs)):
+                added.append(graph.split_edge(node, target, next(fresh)))
+                check_consistent(graph)
+
+    return added
+
+def split_preds(graph: CFG, fresh: Iterator[BasicBlock]) -> list[Node]:
+    added: list[Node] = []
+
+    for node in list(graph.layout):
+        for source in dict.fromkeys(node.ins):
+            added.append(graph.split_edge(source, node, next(fresh)))
+            check_consistent(graph)
+
+    return added
+
+def check_mutations(blocks: list[BasicBlock]):
+    label_blocks(blocks)
+
+    for mutation in (mutate, split_preds):
+        graph = CFG.from_blocks(deepcopy(blocks))
+        before = edges(graph)
+
+        for node in reversed(mutation(graph, new_blocks())):
+            graph.remove_block(node)
+            check_consistent(graph)
+
+        assert edges(graph) == before
+
+PARALLEL: list[BasicBlock] = [
+    [
+        {'label': 'entry'},
+        {'op': 'const', 'dest': 'c', 'type': 'bool', 'value': True},
+        {'op': 'br', 'args': ['c'], 'labels': ['loop', 'loop']}
+    ],
+    [
+        {'label': 'loop'},
+        {'op': 'br', 'args': ['c'], 'labels': ['loop', 'exit']}
+    ],
+    [
+        {'label': 'exit'},
+        {'op': 'ret'}
+    ]
+]
+
+def main():
+    prog: Program = json.load(sys.stdin)
+    blocks = prog_blocks(prog)
+    funcs = [blocks[func['name']] for func in prog['functions']]
+
+    for func_blocks in [PARALLEL, *funcs]:
+        try:
+            check_mutations(func_blocks)
+        except AssertionError:
+            print('result: fail')
+            exit()
+
+    print('result: pass')
+
+if __name__ == '__main__':
+    main()
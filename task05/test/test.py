@@ -4,7 +4,7 @@ from collections import deque
 
 from bb import prog_blocks
 from cfg import CFG, Node
-from dom import DomTree, dom_frontier, dom_tree, dominators
+from dom import Dominators, DomTree, dom_frontier, dom_tree, dominators
 from syntax import Program
 
 def is_dominator(a: Node, b: Node, graph: CFG) -> bool:
@@ -27,7 +27,7 @@ def is_dominator(a: Node, b: Node, graph: CFG) -> bool:
 
     return True
 
-def check_dominators(dom: list[set[Node]], graph: CFG):
+def check_dominators(dom: Dominators, graph: CFG):
     universe = set(graph.all)
 
     for node in graph.all:
@@ -37,8 +37,8 @@ def check_dominators(dom: list[set[Node]], graph: CFG):
         for other in universe.difference(dom[node.id]):
             assert not is_dominator(other, node, graph)
 
-def is_immediate_dominator(a: Node, b: Node, dom: list[set[Node]]) -> bool:
-    if a not in dom[b.id] or a.id == b.id:
+def is_immediate_dominator(a: Node, b: Node, dom: Dominators) -> bool:
+    if not dom.is_reachable(b) or a not in dom[b.id] or a.id == b.id:
         return False
 
     for dominator in dom[b.id]:
@@ -52,7 +52,8 @@ def check_dom_tree(tree: list[DomTree], graph: CFG):
 
     for node in tree:
         if node.parent is None:
-            assert node.node.id == graph.entry.id
+            assert (node.node.id == graph.entry.id
+                    or not dom.is_reachable(node.node))
         else:
             assert is_immediate_dominator(node.parent.node, node.node, dom)
 
@@ -63,7 +64,7 @@ def check_dom_tree(tree: list[DomTree], graph: CFG):
             if other.id not in (child.node.id for child in node.children):
                 assert not is_immediate_dominator(node.node, other, dom)
 
-def in_dominance_frontier(a: Node, b: Node, dom: list[set[Node]]) -> bool:
+def in_dominance_frontier(a: Node, b: Node, dom: Dominators) -> bool:
     if b in dom[a.id] and b.id != a.id:
         return False
 
@@ -2,111 +2,160 @@ import argparse
 import json
 import sys
 from collections import defaultdict
+from typing import Optional
 
-from bb import BasicBlock, flatten_blocks, func_blocks
+from bb import flatten_blocks, func_blocks
 from cfg import CFG, Node
-from dom import dom_frontier, dom_tree, dominators
+from dom import dom_frontier, dom_tree, dominators, iterated_frontier
 from labels import get_label, insert_labels, LabelGenerator
-from syntax import Instruction, Program, Type
+from stats import count, instrument
+from symbols import symbols
+from syntax import Function, Instruction, Item, Program, Type
 
+ORIGINAL = -1
+UNDEF = -2
+
+@instrument('ssa.to_ssa')
 def to_ssa(graph: CFG, args: list[str]):
     dom = dominators(graph)
     frontier = dom_frontier(graph, dom)
     tree = dom_tree(graph, dom)
+    table = symbols((node.block for node in graph.all), args)
 
-    defs: dict[str, list[Node]] = defaultdict(list)
-    vars: list[set[str]] = [set() for _ in graph.all]
-    types: dict[str, Type] = {}
+    defs: dict[int, list[Node]] = defaultdict(list)
+    vars: list[set[int]] = [set() for _ in graph.all]
+    types: dict[int, Type] = {}
 
     for node in graph.all:
         for item in node.block:
-            if 'dest' in item and (var := item['dest']) not in vars[node.id]:
-                assert 'type' in item
+            if 'dest' in item:
+                var = table.ids[item['dest']]
 
-                vars[node.id].add(var)
-                defs[var].append(node)
-                types[var] = item['type']
+                if var not in vars[node.id]:
+                    assert 'type' in item
 
-    phis: list[set[str]] = [set() for _ in graph.all]
-    orig: dict[int, str] = {}
+                    vars[node.id].add(var)
+                    defs[var].append(node)
+                    types[var] = item['type']
 
-    for var in defs:
-        while defs[var]:
-            for node in frontier[defs[var].pop().id]:
-                if var not in phis[node.id]:
-                    phis[node.id].add(var)
+    orig: dict[int, int] = {}
+    phis: dict[int, list[int]] = {}
 
-                    instr: Instruction = {
-                        'op': 'phi',
-                        'dest': var,
-                        'labels': [get_label(pred.block) for pred in node.ins],
-                        'args': [var for _ in node.ins],
-                        'type': types[var],
-                    }
+    for var in defs:
+        for node in iterated_frontier(frontier, defs[var]):
+            instr: Instruction = {
+                'op': 'phi',
+                'dest': table[var],
+                'labels': [get_label(pred.block) for pred in node.ins],
+                'args': [table[var] for _ in node.ins],
+                'type': types[var],
+            }
 
-                    node.block.insert('label' in node.block[0], instr)
-                    orig[id(instr)] = var
+            node.block.insert('label' in node.block[0], instr)
+            orig[id(instr)] = var
+            phis[id(instr)] = [UNDEF for _ in node.ins]
 
-                    if var not in vars[node.id]:
-                        defs[var].append(node)
+    count('ssa.phis', len(phis))
 
-    stack: dict[str, list[str]] = {var: [] for var in defs}
-    next: dict[str, int] = {var: 0 for var in defs}
+    stack: list[list[int]] = [[] for _ in table.keys]
+    next: list[int] = [0 for _ in table.keys]
+    renamed: list[tuple[Item, int, Optional[list[int]]]] = []
 
     for arg in args:
-        stack[arg] = [arg]
+        stack[table.ids[arg]] = [ORIGINAL]
 
-    def rename(node: Node):
-        pop: dict[str, int] = defaultdict(lambda: 0)
+    def rename(node: Node) -> dict[int, int]:
+        pop: dict[int, int] = defaultdict(lambda: 0)
 
         for item in node.block:
-            if 'args' in item and item['op'] != 'phi':
-                item['args'] = [stack[arg][-1] for arg in item['args']]
+            uses: Optional[list[int]] = None
+            version = ORIGINAL
+
+            if 'args' in item:
+                if item['op'] == 'phi':
+                    uses = phis[id(item)]
+                else:
+                    uses = [stack[table.ids[arg]][-1] for arg in item['args']]
 
             if 'dest' in item:
-                dest = item['dest']
+                dest = table.ids[item['dest']]
 
-                new = f'{dest}.{next[dest]}'
+                version = next[dest]
                 next[dest] += 1
                 pop[dest] += 1
 
-                item['dest'] = new
-                stack[dest].append(new)
+                stack[dest].append(version)
+
+            renamed.append((item, version, uses))
 
-        for successor in node.outs:
+        for successor in dict.fromkeys(node.outs):
             for item in successor.block:
                 if 'op' in item and item['op'] == 'phi':
-                    assert 'args' in item
+                    versions = stack[orig[id(item)]]
+                    version = versions[-1] if versions else UNDEF
 
-                    names = stack[orig[id(item)]]
-                    renamed = names[-1] if names else '__undef'
+                    for j, pred in enumerate(successor.ins):
+                        if pred is node:
+                            phis[id(item)][j] = version
 
-                    item['args'][successor.ins.index(node)] = renamed
-
-        for child in tree[node.id].children:
-            rename(child.node)
+        return pop
 
+    def unwind(pop: dict[int, int]):
         for var in pop:
             del stack[var][-pop[var]:]
 
-    rename(graph.entry)
+    work = [(iter(tree[graph.entry.id].children), rename(graph.entry))]
 
-def replace_target(block: BasicBlock, old: str, new: str):
-    last = block[-1]
+    while work:
+        children, pop = work[-1]
 
-    if 'labels' in last:
-        last['labels'] = [
-            new if label == old else label
-                for label in last['labels']
-        ]
-    else:
-        block.append({'op': 'jmp', 'labels': [new]})
+        for child in children:
+            work.append((iter(child.children), rename(child.node)))
+
+            break
+        else:
+            unwind(pop)
+            work.pop()
+
+    for node in graph.all:
+        if not dom.is_reachable(node):
+            unwind(rename(node))
+
+    names: dict[tuple[str, int], str] = {}
+
+    def name(var: str, version: int) -> str:
+        if version == ORIGINAL:
+            return var
+
+        if version == UNDEF:
+            return '__undef'
+
+        key = (var, version)
+
+        if key not in names:
+            names[key] = f'{var}.{version}'
+
+        return names[key]
 
+    for item, version, uses in renamed:
+        if uses is not None:
+            assert 'args' in item
+
+            item['args'] = [
+                name(arg, use) for arg, use in zip(item['args'], uses)
+            ]
+
+        if 'dest' in item:
+            item['dest'] = name(item['dest'], version)
+
+@instrument('ssa.from_ssa')
 def from_ssa(graph: CFG, gen: LabelGenerator):
     for i in range(len(graph.all)):
         node = graph.all[i]
+        preds = list(node.ins)
 
-        for j, pred in enumerate(node.ins):
+        for pred in dict.fromkeys(preds):
+            j = preds.index(pred)
             assignments: list[Instruction] = []
 
             for item in node.block:
@@ -134,24 +183,10 @@ def from_ssa(graph: CFG, gen: LabelGenerator):
             if not assignments:
                 continue
 
-            this_label = get_label(node.block)
-            new_label = gen.next()
-
-            replace_target(pred.block, this_label, new_label)
-
-            graph.all.append(Node(
-                len(graph.all),
-                [
-                    {'label': new_label},
-                    *assignments,
-                    {'op': 'jmp', 'labels': [this_label]}
-                ],
-                [pred],
-                [node]
-            ))
-
-            pred.outs[pred.outs.index(node)] = graph.all[-1]
-            node.ins[j] = graph.all[-1]
+            graph.split_edge(pred, node, [
+                {'label': gen.next()},
+                *assignments
+            ])
 
         node.block = [
             item for item in node.block
@@ -165,6 +200,25 @@ def insert_explicit_return(graph: CFG):
         if 'op' not in last or last['op'] != 'ret':
             node.block.append({'op': 'ret'})
 
+def ssa_func(func: Function, roundtrip: bool = False):
+    func_args = func['args'] if 'args' in func else []
+
+    blocks = func_blocks(func)
+    blocks.insert(0, [{'label': '__entry'}])
+
+    graph = CFG.from_blocks(blocks)
+    gen = LabelGenerator(blocks)
+
+    insert_labels(blocks, gen)
+    insert_explicit_return(graph)
+
+    to_ssa(graph, [arg['name'] for arg in func_args])
+
+    if roundtrip:
+        from_ssa(graph, gen)
+
+    func['instrs'] = flatten_blocks([node.block for node in graph.layout])
+
 def main():
     parser = argparse.ArgumentParser(description='SSA conversion.')
 
@@ -183,23 +237,7 @@ def main():
     prog: Program = json.load(args.file)
 
     for func in prog['functions']:
-        func_args = func['args'] if 'args' in func else []
-
-        blocks = func_blocks(func)
-        blocks.insert(0, [{'label': '__entry'}])
-
-        graph = CFG.from_blocks(blocks)
-        gen = LabelGenerator(blocks)
-
-        insert_labels(blocks, gen)
-        insert_explicit_return(graph)
-
-        to_ssa(graph, [arg['name'] for arg in func_args])
-
-        if args.roundtrip:
-            from_ssa(graph, gen)
-
-        func['instrs'] = flatten_blocks([node.block for node in graph.all])
+        ssa_func(func, args.roundtrip)
 
     json.dump(prog, sys.stdout)
 
@@ -0,0 +1 @@
+../task03/stats.py
\ No newline at end of file
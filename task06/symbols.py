@@ -0,0 +1 @@
+../task03/symbols.py
\ No newline at end of file
@@ -0,0 +1,61 @@
+from typing import Any, Callable, Iterable
+
+from cfg import CFG, Node
+from csr import Snapshot
+from dfa import DFA, Points
+from dom import dom_frontier, Dominators, dominators
+from lva import LiveVars, lva
+from nat import loop_forest, LoopForest
+from rda import ReachingDefs, rda_points
+from symbols import Symbols, symbols
+
+class AnalysisManager:
+    def __init__(self, graph: CFG):
+        self.graph = graph
+        self.cache: dict[str, Any] = {}
+
+    def get(self, name: str, compute: Callable[[], Any]) -> Any:
+        if name not in self.cache:
+            self.cache[name] = compute()
+
+        return self.cache[name]
+
+    def symbols(self) -> Symbols:
+        return self.get(
+            'symbols',
+            lambda: symbols(node.block for node in self.graph.all)
+        )
+
+    def snapshot(self) -> Snapshot:
+        return self.get('snapshot', lambda: Snapshot.from_cfg(self.graph))
+
+    def dominators(self) -> Dominators:
+        return self.get('dom', lambda: dominators(self.snapshot()))
+
+    def frontier(self) -> list[set[Node]]:
+        return self.get(
+            'frontier',
+            lambda: dom_frontier(self.graph, self.dominators())
+        )
+
+    def loops(self) -> LoopForest:
+        return self.get(
+            'loops',
+            lambda: loop_forest(self.graph, self.dominators())
+        )
+
+    def live(self) -> DFA[LiveVars]:
+        return self.get('live', lambda: lva(self.snapshot(), self.symbols()))
+
+    def reaching(self) -> Points[ReachingDefs]:
+        return self.get(
+            'reaching',
+            lambda: rda_points(self.snapshot(), self.symbols())
+        )
+
+    def invalidate(self, preserve: Iterable[str] = ()):
+        kept = set(preserve)
+
+        for name in list(self.cache):
+            if name not in kept:
+                del self.cache[name]
@@ -0,0 +1 @@
+../task04/bits.py
\ No newline at end of file
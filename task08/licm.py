@@ -1,154 +1,166 @@
 import argparse
 import json
 import sys
-from itertools import islice
+from collections import Counter, defaultdict, deque
+from typing import Optional
 
-from bb import flatten_blocks, func_blocks
+from analysis import AnalysisManager
+from bb import BasicBlock, flatten_blocks, func_blocks
 from cfg import CFG, Node
-from dom import dominators
-from labels import get_label, insert_labels, LabelGenerator
-from lva import lva
-from nat import natural_loops
-from rda import Definition, rda
-from syntax import Program
+from labels import insert_labels, LabelGenerator
+from nat import Loop
+from rda import Definition
+from stats import count
+from syntax import Function, Item, Program
 from utils import is_pure
 
-def add_preheader(graph: CFG, loop: list[Node], gen: LabelGenerator) -> Node:
-    header = loop[0]
-    ins = [node for node in header.ins if node not in loop]
+def add_preheader(graph: CFG, loop: Loop, gen: LabelGenerator) -> Node:
+    ins = [node for node in loop.header.ins if node not in loop]
+    pre = graph.insert_block([{'label': gen.next()}], loop.header, ins)
 
-    header_label = get_label(header.block)
-    pre_label = gen.next()
+    loop.preheader = pre
+    outer = loop.parent
 
-    pre = Node(header.id, [{'label': pre_label}], ins, [header])
+    while outer is not None:
+        outer.add(pre)
+        outer = outer.parent
 
-    for node in ins:
-        last = node.block[-1]
-
-        if 'labels' in last:
-            last['labels'] = [
-                pre_label if label == header_label else label
-                    for label in last['labels']
-            ]
-        elif node.id + 1 != pre.id:
-            node.block.append({'op': 'jmp', 'labels': [pre_label]})
-
-        for i, successor in enumerate(node.outs):
-            if successor.id == header.id:
-                node.outs[i] = pre
-
-    header.ins = [pre] + [node for node in header.ins if node not in ins]
+    return pre
 
-    for node in islice(graph.all, header.id, None):
-        node.id += 1
+PRESERVES = ('symbols', 'snapshot', 'dom', 'frontier', 'loops')
 
-    graph.all.insert(pre.id, pre)
+def licm(manager: AnalysisManager, loop: Loop):
+    pre = loop.preheader
+    assert pre is not None
 
-    if pre.id == 0:
-        graph.entry = pre
-    else:
-        before = graph.all[pre.id - 1]
+    reaching = manager.reaching()
+    live = manager.live()
+    exits = loop.exits()
+    dom = manager.dominators()
+    symbols = manager.symbols()
 
-        if before not in ins and 'labels' not in before.block[-1]:
-            before.block.append({'op': 'jmp', 'labels': [header_label]})
+    counts: Counter[int] = Counter()
 
-    return pre
+    for node in loop:
+        for item in node.block:
+            if 'dest' in item:
+                counts[symbols.ids[item['dest']]] += 1
 
-def loop_exits(loop: list[Node]) -> set[Node]:
-    exits: set[Node] = set()
+    deps: dict[Definition, list[Definition]] = {}
+    users: dict[Definition, list[Definition]] = defaultdict(list)
 
     for node in loop:
-        for successor in node.outs:
-            if successor not in loop:
-                exits.add(successor)
+        chains: dict[int, list[Definition]] = defaultdict(list)
 
-    return exits
+        for definition in reaching.before(node, 0).defs:
+            chains[definition.var].append(definition)
 
-def licm(graph: CFG, loop: list[Node], gen: LabelGenerator):
-    pre = add_preheader(graph, loop, gen)
+        for item in node.block:
+            if 'dest' in item and is_pure(item):
+                needed: Optional[list[Definition]] = []
 
-    reaching = rda(graph)
-    live = lva(graph)
-    exits = loop_exits(loop)
-    dom = dominators(graph)
+                for arg in item.get('args', []):
+                    defs = chains[symbols.ids[arg]]
 
-    li: list[Definition] = []
+                    if any(definition.node in loop for definition in defs):
+                        if len(defs) == 1:
+                            needed.append(defs[0])
+                        else:
+                            needed = None
 
-    def is_arg_invariant(var: str, node: Node, idx: int) -> bool:
-        for i in range(idx - 1, -1, -1):
-            item = node.block[i]
+                            break
 
-            if 'dest' in item and item['dest'] == var:
-                definition = Definition(var, node, id(item))
+                if needed is not None:
+                    definition = Definition(
+                        symbols.ids[item['dest']],
+                        node,
+                        id(item)
+                    )
+                    deps[definition] = needed
 
-                return definition in li
+                    for dep in needed:
+                        users[dep].append(definition)
 
-        defs = reaching.ins[node.id].defs
+            if 'dest' in item:
+                var = symbols.ids[item['dest']]
+                chains[var] = [Definition(var, node, id(item))]
 
-        for definition in defs:
-            if definition.var == var and definition.node in loop:
-                if len(defs) == 1:
-                    return definition in li
-                else:
-                    return False
+    pending = {definition: len(needed) for definition, needed in deps.items()}
+    work = deque(
+        definition for definition, count in pending.items() if count == 0
+    )
 
-        return True
+    li: list[Definition] = []
+
+    while work:
+        definition = work.popleft()
+        li.append(definition)
 
-    def is_invariant(node: Node, idx: int) -> bool:
-        instr = node.block[idx]
+        for user in users[definition]:
+            pending[user] -= 1
 
-        if 'args' not in instr:
-            return True
+            if pending[user] == 0:
+                work.append(user)
 
-        for arg in instr['args']:
-            if not is_arg_invariant(arg, node, idx):
+    def dominates_live_exits(definition: Definition) -> bool:
+        for exit in exits:
+            if (not dom.dominates(definition.node, exit)
+                    and definition.var in live.ins[exit.id].vars):
                 return False
 
         return True
 
-    changed = True
+    hoisted: set[Definition] = set()
+    moved: list[Definition] = []
 
-    while changed:
-        changed = False
+    for definition in li:
+        if (definition.var not in live.outs[pre.id].vars
+                and counts[definition.var] == 1
+                and dominates_live_exits(definition)
+                and all(dep in hoisted for dep in deps[definition])):
+            hoisted.add(definition)
+            moved.append(definition)
 
-        for node in loop:
-            for i, item in enumerate(node.block):
-                if 'dest' in item and is_pure(item) and is_invariant(node, i):
-                    definition = Definition(item['dest'], node, id(item))
+    if moved:
+        instrs = {definition.instr for definition in moved}
+        items: dict[int, Item] = {}
 
-                    if definition not in li:
-                        li.append(definition)
-                        changed = True
+        for node in {definition.node for definition in moved}:
+            kept: BasicBlock = []
 
-    def is_unique(definition: Definition) -> bool:
-        for node in loop:
             for item in node.block:
-                if (id(item) != definition.instr
-                        and 'dest' in item and item['dest'] == definition.var):
-                    return False
+                if id(item) in instrs:
+                    items[id(item)] = item
+                else:
+                    kept.append(item)
 
-        return True
+            node.block[:] = kept
 
-    def dominates_live_exits(definition: Definition) -> bool:
-        for exit in exits:
-            if (definition.node not in dom[exit.id]
-                    and definition.var in live.ins[exit.id].vars):
-                return False
+        pre.block[1:1] = [items[definition.instr] for definition in moved]
 
-        return True
+        manager.invalidate(PRESERVES)
 
-    for definition in reversed(li):
-        if (definition.var not in live.outs[pre.id].vars
-                and is_unique(definition)
-                and dominates_live_exits(definition)):
-            for i, item in enumerate(definition.node.block):
-                if id(item) == definition.instr:
-                    pre.block.insert(1, definition.node.block[i])
-                    definition.node.block.pop(i)
+    count('licm.hoisted', len(moved))
+
+def licm_func(func: Function):
+    blocks = func_blocks(func)
+    graph = CFG.from_blocks(blocks)
+    gen = LabelGenerator(blocks)
+
+    insert_labels(blocks, gen)
+
+    manager = AnalysisManager(graph)
+    forest = manager.loops()
 
-                    break
-            else:
-                raise RuntimeError
+    for loop in forest.loops:
+        add_preheader(graph, loop, gen)
+
+    manager.invalidate(('symbols', 'loops'))
+
+    for loop in forest.innermost_first():
+        licm(manager, loop)
+
+    func['instrs'] = flatten_blocks([node.block for node in graph.layout])
 
 def main():
     parser = argparse.ArgumentParser(
@@ -166,25 +178,7 @@ def main():
     prog: Program = json.load(args.file)
 
     for func in prog['functions']:
-        blocks = func_blocks(func)
-        graph = CFG.from_blocks(blocks)
-        gen = LabelGenerator(blocks)
-
-        insert_labels(blocks, gen)
-
-        headers: set[Node] = set()
-
-        while True:
-            for loop in natural_loops(graph):
-                if loop[0] not in headers:
-                    headers.add(loop[0])
-                    licm(graph, loop, gen)
-
-                    break
-            else:
-                break
-
-        func['instrs'] = flatten_blocks([node.block for node in graph.all])
+        licm_func(func)
 
     json.dump(prog, sys.stdout)
 
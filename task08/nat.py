@@ -1,34 +1,127 @@
+from dataclasses import dataclass, field
 from itertools import chain
-from typing import Generator
+from typing import Generator, Iterator, Optional
 
 from cfg import CFG, Node
-from dom import dominators
+from dom import Dominators, dominators
+from stats import instrument
 
 def backward_dfs(node: Node, visited: set[int]) -> Generator[Node, None, None]:
-    if node.id not in visited:
-        visited.add(node.id)
+    if node.id in visited:
+        return
 
-        for predecessor in node.ins:
-            yield from backward_dfs(predecessor, visited)
+    visited.add(node.id)
+    stack = [(node, iter(node.ins))]
 
-        yield node
+    while stack:
+        current, predecessors = stack[-1]
+
+        for predecessor in predecessors:
+            if predecessor.id not in visited:
+                visited.add(predecessor.id)
+                stack.append((predecessor, iter(predecessor.ins)))
+
+                break
+        else:
+            stack.pop()
+
+            yield current
+
+def back_edges(
+    graph: CFG,
+    dom: Optional[Dominators] = None
+) -> list[tuple[Node, Node]]:
+    if dom is None:
+        dom = dominators(graph)
 
-def back_edges(graph: CFG) -> list[tuple[Node, Node]]:
-    dom = dominators(graph)
     edges: list[tuple[Node, Node]] = []
 
     for node in graph.all:
+        if not dom.is_reachable(node):
+            continue
+
         for successor in node.outs:
-            if successor in dom[node.id]:
+            if dom.dominates(successor, node):
                 edges.append((node, successor))
 
     return edges
 
-def natural_loops(graph: CFG) -> list[list[Node]]:
-    edges = back_edges(graph)
+def natural_loops(
+    graph: CFG,
+    dom: Optional[Dominators] = None
+) -> list[list[Node]]:
+    edges = back_edges(graph, dom)
     loops: list[list[Node]] = []
 
     for t, h in edges:
         loops.append(list(chain((h,), backward_dfs(t, {h.id}))))
 
     return loops
+
+@dataclass(eq=False)
+class Loop:
+    header: Node
+    body: list[Node]
+    nodes: set[Node]
+    parent: Optional['Loop'] = None
+    children: list['Loop'] = field(default_factory=list)
+    depth: int = 1
+    preheader: Optional[Node] = None
+
+    def __contains__(self, node: Node) -> bool:
+        return node in self.nodes
+
+    def __iter__(self) -> Iterator[Node]:
+        return iter(self.body)
+
+    def __len__(self) -> int:
+        return len(self.body)
+
+    def add(self, node: Node):
+        if node not in self.nodes:
+            self.nodes.add(node)
+            self.body.append(node)
+
+    def exits(self) -> set[Node]:
+        return {
+            successor for node in self.body
+                for successor in node.outs if successor not in self.nodes
+        }
+
+@dataclass
+class LoopForest:
+    loops: list[Loop]
+    roots: list[Loop]
+
+    def innermost_first(self) -> list[Loop]:
+        return sorted(self.loops, key=lambda loop: -loop.depth)
+
+@instrument('analysis.loops')
+def loop_forest(graph: CFG, dom: Optional[Dominators] = None) -> LoopForest:
+    headers: dict[Node, Loop] = {}
+
+    for t, h in back_edges(graph, dom):
+        if h not in headers:
+            headers[h] = Loop(h, [h], {h})
+
+        loop = headers[h]
+
+        for node in backward_dfs(t, {node.id for node in loop.nodes}):
+            loop.add(node)
+
+    loops = list(headers.values())
+    innermost: dict[Node, Loop] = {}
+    roots: list[Loop] = []
+
+    for loop in sorted(loops, key=len, reverse=True):
+        if loop.header in innermost:
+            loop.parent = innermost[loop.header]
+            loop.parent.children.append(loop)
+            loop.depth = loop.parent.depth + 1
+        else:
+            roots.append(loop)
+
+        for node in loop.body:
+            innermost[node] = loop
+
+    return LoopForest(loops, roots)
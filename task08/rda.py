@@ -1,11 +1,14 @@
 from dataclasses import dataclass
 from typing import NamedTuple
 
-from cfg import CFG, Node
-from dfa import dfa, DFA, Direction, Framework, Value
+from bits import BitSet, DenseDFA, Universe
+from cfg import Node
+from csr import Graph
+from dfa import dfa, DFA, Direction, Framework, Points, Value
+from symbols import Symbols
 
 class Definition(NamedTuple):
-    var: str
+    var: int
     node: Node
     instr: int
 
@@ -25,41 +28,108 @@ class ReachingDefs(Value):
 
 @dataclass(init=False)
 class Transfer:
-    gen: list[set[Definition]]
-    kill: list[set[Definition]]
+    symbols: Symbols
+    gen: list[dict[int, Definition]]
 
-    def __init__(self, graph: CFG) -> None:
-        self.gen = [set() for _ in graph.all]
-        self.kill = [set() for _ in graph.all]
+    def __init__(self, graph: Graph, symbols: Symbols) -> None:
+        self.symbols = symbols
+        self.gen = [{} for _ in graph.all]
 
-        defs: dict[str, set[Definition]] = {}
+        for i, node in enumerate(graph.all):
+            for item in node.block:
+                if 'dest' in item:
+                    var = symbols.intern(item['dest'])
+                    self.gen[i][var] = Definition(var, node, id(item))
+
+    def __call__(self, node: Node, arg: ReachingDefs) -> ReachingDefs:
+        gen = self.gen[node.id]
+
+        defs = {
+            definition for definition in arg.defs
+                if definition.var not in gen
+        }
+        defs.update(gen.values())
+
+        return ReachingDefs(defs)
+
+    def step(self, node: Node, idx: int, arg: ReachingDefs) -> ReachingDefs:
+        item = node.block[idx]
+
+        if 'dest' not in item:
+            return arg
+
+        var = self.symbols.intern(item['dest'])
+
+        defs = {
+            definition for definition in arg.defs if definition.var != var
+        }
+        defs.add(Definition(var, node, id(item)))
+
+        return ReachingDefs(defs)
+
+def rda_framework(
+    graph: Graph,
+    symbols: Symbols
+) -> Framework[ReachingDefs]:
+    transfer = Transfer(graph, symbols)
+
+    return Framework(
+        Direction.FORWARD,
+        ReachingDefs,
+        transfer,
+        ReachingDefs(set()),
+        transfer.step
+    )
+
+def rda(graph: Graph, symbols: Symbols) -> DFA[ReachingDefs]:
+    return dfa(graph, rda_framework(graph, symbols))
+
+def rda_points(graph: Graph, symbols: Symbols) -> Points[ReachingDefs]:
+    return Points(graph, lambda graph: rda_framework(graph, symbols))
+
+@dataclass(init=False)
+class DenseTransfer:
+    defs: Universe[Definition]
+    gen: list[int]
+    kill: list[int]
+
+    def __init__(self, graph: Graph, symbols: Symbols) -> None:
+        self.defs = Universe()
+        self.gen = [0 for _ in graph.all]
+        self.kill = [0 for _ in graph.all]
+
+        bits: dict[int, int] = {}
 
         for node in graph.all:
             for item in node.block:
                 if 'dest' in item:
-                    var_defs = defs.setdefault(item['dest'], set())
-                    var_defs.add(Definition(item['dest'], node, id(item)))
+                    var = symbols.intern(item['dest'])
+                    bit = self.defs.bit(Definition(var, node, id(item)))
+                    bits[var] = bits.get(var, 0) | bit
 
         for i, node in enumerate(graph.all):
             for item in node.block:
                 if 'dest' in item:
-                    self.gen[i].difference_update(defs[item['dest']])
-                    self.gen[i].add(Definition(item['dest'], node, id(item)))
+                    var = symbols.ids[item['dest']]
+                    bit = self.defs.bit(Definition(var, node, id(item)))
 
-                    self.kill[i].update(defs[item['dest']])
+                    self.gen[i] &= ~bits[var]
+                    self.gen[i] |= bit
 
-    def __call__(self, node: Node, arg: ReachingDefs) -> ReachingDefs:
-        defs = arg.defs.difference(self.kill[node.id])
-        defs.update(self.gen[node.id])
+                    self.kill[i] |= bits[var]
 
-        return ReachingDefs(defs)
+    def __call__(self, node: Node, arg: BitSet) -> BitSet:
+        return BitSet(arg.bits & ~self.kill[node.id] | self.gen[node.id])
 
-def rda(graph: CFG) -> DFA[ReachingDefs]:
+def rda_dense(graph: Graph, symbols: Symbols) -> DenseDFA[Definition]:
+    transfer = DenseTransfer(graph, symbols)
     framework = Framework(
         Direction.FORWARD,
-        ReachingDefs,
-        Transfer(graph),
-        ReachingDefs(set())
+        BitSet,
+        transfer,
+        BitSet(0)
     )
 
-    return dfa(graph, framework)
+    result = dfa(graph, framework)
+
+    return DenseDFA(result.ins, result.outs, result.visits, transfer.defs)
@@ -5,6 +5,9 @@ import sys
 def is_free(item) -> bool:
     return 'op' in item and item['op'] == 'free'
 
+def nofree_func(func):
+    func['instrs'] = [item for item in func['instrs'] if not is_free(item)]
+
 def main():
     parser = argparse.ArgumentParser(
         description='Removes all `free` instructions.'
@@ -21,7 +24,7 @@ def main():
     prog = json.load(args.file)
 
     for func in prog['functions']:
-        func['instrs'] = [item for item in func['instrs'] if not is_free(item)]
+        nofree_func(func)
 
     json.dump(prog, sys.stdout)
 
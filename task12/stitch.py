@@ -10,6 +10,10 @@ def stitch(instrs, trace):
         *instrs,
     ]
 
+def stitch_func(func, name, trace):
+    if func['name'] == name:
+        func['instrs'] = stitch(func['instrs'], trace)
+
 def main():
     parser = argparse.ArgumentParser(
         description='Adds a speculative trace to a function.'
@@ -37,10 +41,7 @@ def main():
     trace = json.load(args.trace)
 
     for func in prog['functions']:
-        if func['name'] == args.func:
-            func['instrs'] = stitch(func['instrs'], trace)
-
-            break
+        stitch_func(func, args.func, trace)
 
     json.dump(prog, sys.stdout)
 